@@ -0,0 +1,112 @@
+import numpy as np
+from scipy import sparse
+from scipy.sparse import linalg as splinalg
+
+ACTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)] # su, giu, sinistra, destra
+
+# Azione scelta -> azioni effettivamente eseguite [principale, deviazione 1, deviazione 2]
+# 0(Su) e 1(Giù) deviano in 2(Sx), 3(Dx); 2(Sx) e 3(Dx) deviano in 0(Su), 1(Giù)
+SLIP_DEVIATIONS = [[0, 2, 3],
+                   [1, 2, 3],
+                   [2, 0, 1],
+                   [3, 0, 1]]
+
+def next_state_table(shape, actions=ACTIONS):
+    """
+    Tabella (S, A) int32 dello stato raggiunto eseguendo esattamente l'azione a
+    (uscendo dalla griglia si resta fermi), stati in row-major s = r * num_col + c
+    """
+    num_row, num_col = shape
+    rows, cols = np.indices(shape)
+    next_state = np.empty((num_row * num_col, len(actions)), dtype=np.int32)
+    for a, (move_r, move_c) in enumerate(actions):
+        next_r = np.clip(rows + move_r, 0, num_row - 1)
+        next_c = np.clip(cols + move_c, 0, num_col - 1)
+        next_state[:, a] = (next_r * num_col + next_c).ravel()
+    return next_state
+
+class GridModel:
+    """
+    Modello della griglia compilato una sola volta.
+
+    P(s'|s,a) e' una matrice CSR (S*A, S): la riga s * A + a contiene la
+    distribuzione dello stato successivo. R(s,a) e' il vettore (S*A,) del reward
+    atteso REWARD + ENV[s']. Gli stati sono numerati in row-major (s = r * num_col + c).
+
+    Con probs=(1.0,) il modello e' deterministico (ACTIONS); con probs=(0.8, 0.1, 0.1)
+    si usa lo scivolamento descritto da SLIP_DEVIATIONS.
+    """
+
+    def __init__(self, env, reward, gamma, probs=(1.0,), deviations=None, actions=ACTIONS):
+        env = np.asarray(env, dtype=float)
+        self.shape = env.shape
+        self.gamma = gamma
+        self.num_states = env.size
+        self.num_actions = len(actions)
+
+        if deviations is None:
+            if len(probs) == 1:
+                deviations = [[a] for a in range(self.num_actions)]
+            else:
+                deviations = SLIP_DEVIATIONS
+
+        # Tabella (S, A) dello stato raggiunto eseguendo esattamente l'azione a
+        self.next_state = next_state_table(env.shape, actions)
+
+        # Una voce per ogni (s, a, esito); i duplicati (es. due deviazioni contro
+        # lo stesso muro) vengono sommati nella conversione a CSR
+        num_rows = self.num_states * self.num_actions
+        row_idx, col_idx, data = [], [], []
+        for i, prob in enumerate(probs):
+            executed = [deviations[a][i] for a in range(self.num_actions)]
+            row_idx.append(np.arange(num_rows))
+            col_idx.append(self.next_state[:, executed].ravel())
+            data.append(np.full(num_rows, prob))
+
+        self.P = sparse.csr_matrix(
+            (np.concatenate(data), (np.concatenate(row_idx), np.concatenate(col_idx))),
+            shape=(num_rows, self.num_states))
+
+        # Il reward dipende solo dallo stato di arrivo
+        self.state_reward = reward + env.ravel()
+        self.R = self.P @ self.state_reward
+
+    def q_values(self, V):
+        """Q(s,a) = R(s,a) + gamma * sum_s' P(s'|s,a) V(s') come matrice (S, A)"""
+        v = np.asarray(V, dtype=float).ravel()
+        return (self.R + self.gamma * (self.P @ v)).reshape(self.num_states, self.num_actions)
+
+    def policy_rows(self, policy):
+        """Indici delle righe di P e R selezionate dalla policy"""
+        actions = np.asarray(policy, dtype=int).ravel()
+        return np.arange(self.num_states) * self.num_actions + actions
+
+    def policy_model(self, policy):
+        """Restituisce (P_pi, R_pi): matrice CSR (S, S) e vettore (S,) della policy"""
+        rows = self.policy_rows(policy)
+        return self.P[rows], self.R[rows]
+
+    def evaluate_policy(self, policy, method="direct", V=None, tol=1e-8):
+        """
+        Valutazione esatta: risolve (I - gamma * P_pi) V = R_pi.
+        method="direct" usa una fattorizzazione LU sparsa, method="gmres"
+        il solver iterativo GMRES (partendo da V, se fornito).
+        """
+        P_pi, R_pi = self.policy_model(policy)
+        A = sparse.identity(self.num_states, format="csr") - self.gamma * P_pi
+
+        if method == "direct":
+            v = splinalg.spsolve(A.tocsc(), R_pi)
+        elif method == "gmres":
+            x0 = None if V is None else np.asarray(V, dtype=float).ravel()
+            v, info = splinalg.gmres(A, R_pi, x0=x0, rtol=tol, atol=0.0)
+            if info != 0:
+                raise RuntimeError(f"GMRES non converge (info={info})")
+        else:
+            raise ValueError(f"Metodo sconosciuto: {method}")
+
+        return v.reshape(self.shape)
+
+    def greedy_policy(self, V):
+        """Azione greedy per ogni stato, con la forma della griglia"""
+        return np.argmax(self.q_values(V), axis=1).reshape(self.shape)
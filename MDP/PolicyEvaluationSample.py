@@ -1,6 +1,9 @@
+import sys
 import numpy as np
 from random import randint
 from pprint import pprint
+from GridModel import GridModel
+from grid_bench import benchmark_policy_evaluation
 
 # --> ENV
 NUM_ROW = 3
@@ -15,6 +18,7 @@ ACTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
 REWARD = -0.1
 GAMMA = 0.9
 TRESHOLD = 1e-3
+MPI_SWEEPS = 3 # sweep di valutazione per iterazione in modifiedPolicyIteration
 
 def get_next_state(s, a):
     row, col = s
@@ -28,21 +32,26 @@ def get_next_state(s, a):
 
     return (next_r, next_c)
 
-def policyEvaluation(V, P):
-    while True:
-        delta = 0
-        for r in range(NUM_ROW):
-            for c in range(NUM_COL):
-                action_idx = int(P[r][c])
-                action = ACTIONS[action_idx]
-                
-                next_r, next_c = get_next_state((r, c), action)
-                new_v = REWARD + ENV[next_r][next_c] + GAMMA*V[next_r][next_c]
+def evaluationSweep(V, P):
+    # Un singolo sweep di valutazione (in place), restituisce la variazione massima
+    delta = 0
+    for r in range(NUM_ROW):
+        for c in range(NUM_COL):
+            action_idx = int(P[r][c])
+            action = ACTIONS[action_idx]
+            
+            next_r, next_c = get_next_state((r, c), action)
+            new_v = REWARD + ENV[next_r][next_c] + GAMMA*V[next_r][next_c]
 
-                old_v = V[r][c]
-                V[r][c] = new_v
+            old_v = V[r][c]
+            V[r][c] = new_v
 
-                delta = max(delta, abs(new_v - old_v))
+            delta = max(delta, abs(new_v - old_v))
+    return delta
+
+def policyEvaluation(V, P):
+    while True:
+        delta = evaluationSweep(V, P)
         if delta < TRESHOLD:
             break
 
@@ -69,14 +78,95 @@ def policyImprovement(V,P):
 
     return P, policy_stable
 
-def policyIteration(V, P):
+# --> MODIFIED POLICY ITERATION
+
+def policyImprovementCount(V, P):
+    # Come policyImprovement, ma conta le azioni cambiate su tutte le celle
+    changes = 0
+    for r in range(NUM_ROW):
+        for c in range(NUM_COL):
+            values = []
+            for action in ACTIONS:
+                next_r, next_c = get_next_state((r, c), action)
+                val = REWARD + ENV[next_r][next_c] + GAMMA*V[next_r][next_c]
+                values.append(val)
+
+            best_action = np.argmax(values)
+            if P[r][c] != best_action:
+                changes += 1
+            P[r][c] = best_action
+
+    return P, changes
+
+def modifiedPolicyIteration(V, P, k=MPI_SWEEPS):
+    """
+    Valutazione troncata a k sweep: V non viene riportato a convergenza ad ogni
+    passo ma resta "caldo" tra un'iterazione e l'altra. Ci si ferma quando nessuna
+    azione cambia e l'ultimo sweep ha variazione sotto TRESHOLD.
+    """
+    print(P, "\n")
+    iteration = 0
+    total_sweeps = 0
+    while True:
+        iteration += 1
+        for _ in range(k):
+            delta = evaluationSweep(V, P)
+            total_sweeps += 1
+            if delta < TRESHOLD:
+                break
+
+        P, changes = policyImprovementCount(V, P)
+        print(f"Iterazione {iteration}: {changes} azioni cambiate, delta = {delta:.5f}")
+
+        if changes == 0 and delta < TRESHOLD:
+            print(P, "\n")
+            print(f"Policy ottimizzata! ({total_sweeps} sweep di valutazione)")
+            break
+
+    return V, P
+
+# --> VERSIONE SPARSA (GridModel)
+
+def policyEvaluationSparse(V, P, model, method="sweep"):
+    # "direct" / "gmres": soluzione esatta del sistema lineare in una sola chiamata
+    if method != "sweep":
+        V[:] = model.evaluate_policy(P, method, V)
+        return V
+
+    # "sweep": ogni sweep e' un prodotto matrice sparsa-vettore su P_pi
+    P_pi, R_pi = model.policy_model(P)
+    v = np.asarray(V, dtype=float).ravel()
+    while True:
+        new_v = R_pi + model.gamma * (P_pi @ v)
+        delta = np.max(np.abs(new_v - v))
+        v = new_v
+        if delta < TRESHOLD:
+            break
+
+    V[:] = v.reshape(model.shape)
+    return V
+
+def policyImprovementSparse(V, P, model):
+    new_P = model.greedy_policy(V)
+    policy_stable = np.array_equal(new_P, P)
+    P[:] = new_P
+
+    return P, policy_stable
+
+def policyIteration(V, P, model=None, method="sweep"):
     print(P, "\n")
     while True:
         print("Valutazione in corso...")
-        V = policyEvaluation(V, P)
+        if model is None:
+            V = policyEvaluation(V, P)
+        else:
+            V = policyEvaluationSparse(V, P, model, method)
 
         print("Miglioramento Policy...\n")
-        P, policy_stable = policyImprovement(V, P)
+        if model is None:
+            P, policy_stable = policyImprovement(V, P)
+        else:
+            P, policy_stable = policyImprovementSparse(V, P, model)
         print(P, "\n")
 
         if policy_stable:
@@ -86,10 +176,28 @@ def policyIteration(V, P):
 
 
 
+# --> BENCHMARK
+
+def benchmark():
+    # Ciclo Python contro modello compilato (vedi grid_bench.py)
+    benchmark_policy_evaluation(sys.modules[__name__], lambda env: GridModel(env, REWARD, GAMMA))
+
 def main():
     V_init = np.zeros((NUM_ROW, NUM_COL))
     P_init = np.zeros((NUM_ROW, NUM_COL))
-    policyIteration(V_init, P_init)
-
-main()
+    if len(sys.argv) > 1 and sys.argv[1] == "mpi":
+        modifiedPolicyIteration(V_init, P_init)
+        return
+
+    model = None
+    method = "sweep"
+    if len(sys.argv) > 1 and sys.argv[1] in ("sparse", "direct", "gmres"):
+        model = GridModel(ENV, REWARD, GAMMA)
+        method = "sweep" if sys.argv[1] == "sparse" else sys.argv[1]
+    policyIteration(V_init, P_init, model, method)
+
+if len(sys.argv) > 1 and sys.argv[1] == "bench":
+    benchmark()
+else:
+    main()
 
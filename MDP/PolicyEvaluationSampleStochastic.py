@@ -1,6 +1,9 @@
+import sys
 import numpy as np
 from random import randint
 from pprint import pprint
+from GridModel import GridModel
+from grid_bench import benchmark_policy_evaluation
 
 # --> ENV
 NUM_ROW = 3
@@ -94,24 +97,72 @@ def policyImprovement(V,P):
 
     return P, policy_stable
 
-def policyIteration(V, P):
+# --> VERSIONE SPARSA (GridModel)
+
+def policyEvaluationSparse(V, P, model, method="sweep"):
+    # "direct" / "gmres": soluzione esatta del sistema lineare in una sola chiamata
+    if method != "sweep":
+        V[:] = model.evaluate_policy(P, method, V)
+        return V
+
+    # "sweep": ogni sweep e' un prodotto matrice sparsa-vettore su P_pi
+    P_pi, R_pi = model.policy_model(P)
+    v = np.asarray(V, dtype=float).ravel()
+    while True:
+        new_v = R_pi + model.gamma * (P_pi @ v)
+        delta = np.max(np.abs(new_v - v))
+        v = new_v
+        if delta < TRESHOLD:
+            break
+
+    V[:] = v.reshape(model.shape)
+    return V
+
+def policyImprovementSparse(V, P, model):
+    new_P = model.greedy_policy(V)
+    policy_stable = np.array_equal(new_P, P)
+    P[:] = new_P
+
+    return P, policy_stable
+
+def policyIteration(V, P, model=None, method="sweep"):
     print(P, "\n")
     while True:
         print("Valutazione in corso...")
-        V = policyEvaluation(V, P)
+        if model is None:
+            V = policyEvaluation(V, P)
+        else:
+            V = policyEvaluationSparse(V, P, model, method)
 
         print("Miglioramento Policy...\n")
-        P, policy_stable = policyImprovement(V, P)
+        if model is None:
+            P, policy_stable = policyImprovement(V, P)
+        else:
+            P, policy_stable = policyImprovementSparse(V, P, model)
         print(P, "\n")
 
         if policy_stable:
             print("Policy ottimizzata!")
             break
 
+# --> BENCHMARK
+
+def benchmark():
+    # Ciclo Python contro modello compilato (vedi grid_bench.py)
+    benchmark_policy_evaluation(sys.modules[__name__], lambda env: GridModel(env, REWARD, GAMMA, probs=PROBS))
+
 def main():
     V_init = np.zeros((NUM_ROW, NUM_COL))
     P_init = np.zeros((NUM_ROW, NUM_COL))
-    policyIteration(V_init, P_init)
-
-main()
+    model = None
+    method = "sweep"
+    if len(sys.argv) > 1 and sys.argv[1] in ("sparse", "direct", "gmres"):
+        model = GridModel(ENV, REWARD, GAMMA, probs=PROBS)
+        method = "sweep" if sys.argv[1] == "sparse" else sys.argv[1]
+    policyIteration(V_init, P_init, model, method)
+
+if len(sys.argv) > 1 and sys.argv[1] == "bench":
+    benchmark()
+else:
+    main()
 
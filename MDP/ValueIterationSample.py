@@ -1,6 +1,11 @@
+import sys
+import time
+import heapq
 import numpy as np
 from pprint import pprint
 from random import randint
+from GridModel import GridModel, next_state_table
+from grid_bench import set_env, random_env
 
 # --> ENVIRONMENT
 NUM_ROW = 4
@@ -31,7 +36,7 @@ def get_next_state(s, a):
 
 # --> VALUE ITERATION
 
-def valueIteration(V):
+def valueIteration(V, verbose=True):
     i = 1
     while True:
         delta = 0
@@ -50,14 +55,144 @@ def valueIteration(V):
                 delta = max(delta, abs(new_v - old_v))
 
         i += 1
-        print(f"Iterazione {i}")
-        print(V, "\n")
+        if verbose:
+            print(f"Iterazione {i}")
+            print(V, "\n")
 
         if delta < THETA:
             break
     
     return V
 
+# --> VALUE ITERATION VETTORIZZATA
+
+def build_tables(env, step_reward=REWARD):
+    """
+    Precalcola una volta sola la tabella (S, A) degli indici di stato successivo
+    e il vettore dei reward di ingresso in ogni stato (step_reward + ENV[s']).
+    Gli stati sono numerati in row-major: s = r * num_col + c.
+    """
+    env = np.asarray(env, dtype=float)
+    next_state = next_state_table(env.shape, ACTIONS)
+    state_reward = step_reward + env.ravel()
+    return next_state, state_reward
+
+def valueIterationVectorized(V, env=ENV, tables=None):
+    """
+    Value iteration sincrona: ogni sweep e' un gather sulla tabella (S, A)
+    seguito da un max sulle azioni. Restituisce V e il numero di sweep.
+    """
+    next_state, state_reward = build_tables(env) if tables is None else tables
+    v = np.asarray(V, dtype=float).ravel().copy()
+
+    sweeps = 0
+    while True:
+        backup = state_reward + GAMMA * v
+        new_v = backup[next_state].max(axis=1)
+        delta = np.max(np.abs(new_v - v))
+        v = new_v
+        sweeps += 1
+
+        if delta < THETA:
+            break
+
+    return v.reshape(np.shape(env)), sweeps
+
+def valueIterationSparse(V, model):
+    # Stesso backup espresso come prodotto sparso P @ V sul modello compilato
+    v = np.asarray(V, dtype=float).ravel().copy()
+    while True:
+        new_v = model.q_values(v).max(axis=1)
+        delta = np.max(np.abs(new_v - v))
+        v = new_v
+
+        if delta < THETA:
+            break
+
+    return v.reshape(model.shape)
+
+# --> PRIORITIZED SWEEPING (GAUSS-SEIDEL ASINCRONO)
+
+def build_predecessors(next_state):
+    """
+    Indice inverso delle transizioni in formato CSR: i predecessori di s' sono
+    preds[ptr[s']:ptr[s'+1]] (ogni predecessore compare una sola volta).
+    """
+    num_states, num_actions = next_state.shape
+    src = np.repeat(np.arange(num_states, dtype=np.int64), num_actions)
+    dst = next_state.ravel().astype(np.int64)
+
+    pairs = np.unique(dst * num_states + src)
+    dst, preds = pairs // num_states, pairs % num_states
+
+    ptr = np.zeros(num_states + 1, dtype=np.int64)
+    np.cumsum(np.bincount(dst, minlength=num_states), out=ptr[1:])
+    return ptr, preds
+
+def valueIterationPrioritized(V, env=ENV, tables=None):
+    """
+    Value iteration asincrona: si aggiorna sempre lo stato con errore di Bellman
+    piu' alto (heap) e, quando il suo valore cambia, si ricalcola la priorita'
+    dei soli predecessori. Il backup calcolato per la priorita' resta in
+    memoria e diventa il nuovo valore quando lo stato esce dallo heap: ogni
+    cambiamento di v[s] lo ricalcola per tutti i predecessori di s, quindi e'
+    sempre aggiornato. Restituisce V e il numero di backup eseguiti: ogni
+    valutazione dell'equazione di Bellman, compreso lo sweep iniziale delle
+    priorita'.
+
+    Su questo MDP conviene poco: il reward si prende entrando in una cella,
+    anche restando fermi contro il bordo o in una cella +1/-1 (che non
+    termina), quindi le celle con reward sono cicli che accumulano valore
+    fino a 1 / (1 - GAMMA). Ogni stato cambia a ogni ordine di grandezza
+    dell'errore e viene aggiornato piu' volte, anche con REWARD = 0: il
+    benchmark mostra piu' backup che con gli sweep completi.
+    """
+    next_state, state_reward = build_tables(env) if tables is None else tables
+    ptr, preds = build_predecessors(next_state)
+
+    v0 = np.asarray(V, dtype=float).ravel()
+    targets = (state_reward + GAMMA * v0)[next_state].max(axis=1)
+    errors = np.abs(targets - v0)
+
+    # Copie in liste per il ciclo scalare
+    next_list = next_state.tolist()
+    reward_list = state_reward.tolist()
+    ptr, preds = ptr.tolist(), preds.tolist()
+    v = v0.tolist()
+    target = targets.tolist() # backup di Bellman corrente di ogni stato
+
+    # Le priorita' iniziali costano un backup per stato
+    backups = len(v)
+
+    def bellman(s):
+        nonlocal backups
+        backups += 1
+        return max(reward_list[n] + GAMMA * v[n] for n in next_list[s])
+
+    # Priorita' corrente di ogni stato nello heap (0 = non in coda)
+    priority = np.where(errors > THETA, errors, 0.0).tolist()
+    heap = [(-e, s) for s, e in enumerate(priority) if e > 0]
+    heapq.heapify(heap)
+
+    while heap:
+        neg_error, s = heapq.heappop(heap)
+        if -neg_error != priority[s]:
+            continue # voce superata da una priorita' piu' alta
+        priority[s] = 0.0
+
+        if target[s] == v[s]:
+            continue
+        v[s] = target[s]
+
+        for p in preds[ptr[s]:ptr[s + 1]]:
+            target[p] = bellman(p)
+            error = abs(target[p] - v[p])
+            if error > THETA and error > priority[p]:
+                priority[p] = error
+                heapq.heappush(heap, (-error, p))
+
+    return np.array(v).reshape(np.shape(env)), backups
+
 # --> POLICY OPTIMISATION
 
 def get_Policy(V, P):
@@ -126,16 +261,82 @@ def run_episode(env, policy, start_state):
     else:
         print("Ho finito i passi prima di trovare il tesoro.")
 
+# --> BENCHMARK
+
+def benchmark(loop_sizes=((4, 3), (20, 20), (50, 50)),
+              vector_sizes=((200, 200), (500, 500)),
+              prioritized_sizes=((4, 3), (20, 20), (100, 100))):
+    script = sys.modules[__name__]
+    original_env = ENV
+    print(f"{'griglia':>10} {'celle':>8} {'loop (s)':>10} {'vett. (s)':>10} {'speedup':>8}")
+
+    for num_row, num_col in loop_sizes:
+        env = original_env if (num_row, num_col) == (4, 3) else random_env(num_row, num_col, density=0.02)
+        set_env(script, env)
+
+        start = time.perf_counter()
+        V_loop = valueIteration(np.zeros((num_row, num_col)), verbose=False)
+        t_loop = time.perf_counter() - start
+
+        start = time.perf_counter()
+        V_vec, _ = valueIterationVectorized(np.zeros((num_row, num_col)), env)
+        t_vec = time.perf_counter() - start
+
+        # Il ciclo originale e' Gauss-Seidel, quello vettorizzato sincrono:
+        # convergono allo stesso punto fisso a meno della soglia
+        assert np.allclose(V_loop, V_vec, atol=10 * THETA / (1 - GAMMA))
+        print(f"{num_row:>4}x{num_col:<5} {num_row * num_col:>8} {t_loop:>10.4f} {t_vec:>10.4f} {t_loop / t_vec:>7.1f}x")
+
+    for num_row, num_col in vector_sizes:
+        env = random_env(num_row, num_col, density=0.02)
+        start = time.perf_counter()
+        tables = build_tables(env)
+        t_build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, sweeps = valueIterationVectorized(np.zeros((num_row, num_col)), env, tables)
+        t_vec = time.perf_counter() - start
+        print(f"{num_row:>4}x{num_col:<5} {num_row * num_col:>8} {'-':>10} {t_vec:>10.4f}"
+              f"   (tabelle {t_build:.3f}s, {sweeps} sweep)")
+
+    # Backup fino a convergenza: sweep completi contro prioritized sweeping,
+    # con il REWARD dello script e senza costo di passo (reward solo nelle celle +1/-1)
+    print(f"\n{'griglia':>10} {'REWARD':>7} {'backup sweep':>13} {'backup prio':>12} {'rapporto':>9} {'vett. (s)':>10} {'prio (s)':>9}")
+    for (num_row, num_col), step_reward in [(size, r) for size in prioritized_sizes for r in (REWARD, 0.0)]:
+        env = original_env if (num_row, num_col) == (4, 3) else random_env(num_row, num_col, density=0.002)
+        tables = build_tables(env, step_reward)
+        start = time.perf_counter()
+        V_vec, sweeps = valueIterationVectorized(np.zeros((num_row, num_col)), env, tables)
+        t_vec = time.perf_counter() - start
+
+        start = time.perf_counter()
+        V_prio, backups = valueIterationPrioritized(np.zeros((num_row, num_col)), env, tables)
+        t_prio = time.perf_counter() - start
+
+        assert np.allclose(V_vec, V_prio, atol=10 * THETA / (1 - GAMMA))
+        full = sweeps * num_row * num_col
+        print(f"{num_row:>4}x{num_col:<5} {step_reward:>7} {full:>13} {backups:>12} {full / backups:>8.1f}x {t_vec:>10.4f} {t_prio:>9.3f}")
+
+    set_env(script, original_env)
+
 def main():
     V = np.zeros((NUM_ROW, NUM_COL))
     P = np.zeros((NUM_ROW, NUM_COL))
 
-    V = valueIteration(V)
-    P = get_Policy(V, P)
+    if len(sys.argv) > 1 and sys.argv[1] == "sparse":
+        model = GridModel(ENV, REWARD, GAMMA)
+        V = valueIterationSparse(V, model)
+        P = model.greedy_policy(V)
+    else:
+        V = valueIteration(V)
+        P = get_Policy(V, P)
     print_Policy(P)
 
     print("\n---Test sul Campo ---")
     # Partiamo dalla casella pericolosa vicino al fuoco (1, 0)
     run_episode(ENV, P, (randint(0, NUM_ROW -1), randint(0, NUM_COL -1)))
 
-main()
\ No newline at end of file
+if len(sys.argv) > 1 and sys.argv[1] == "bench":
+    benchmark()
+else:
+    main()
\ No newline at end of file
@@ -0,0 +1,55 @@
+import time
+import numpy as np
+
+# Funzioni di benchmark comuni agli script di MDP/. Gli script tengono la
+# griglia in variabili globali (ENV, NUM_ROW, NUM_COL) lette dalle funzioni a
+# ciclo Python: qui si ricevono come modulo (sys.modules[__name__]).
+
+def set_env(script, env):
+    # Sostituisce la griglia globale usata dalle funzioni a ciclo Python dello script
+    script.ENV = [tuple(row) for row in env]
+    script.NUM_ROW, script.NUM_COL = len(script.ENV), len(script.ENV[0])
+
+def random_env(num_row, num_col, seed=0, density=0.1):
+    # Griglia con terminali +1/-1 sparsi, come ENV ma piu' grande
+    rng = np.random.default_rng(seed)
+    cells = rng.choice([0, 1, -1], size=(num_row, num_col),
+                       p=[1 - density, density / 2, density / 2])
+    return cells.astype(int)
+
+def benchmark_policy_evaluation(script, make_model, loop_sizes=(5, 20, 50, 100), sparse_sizes=(300, 600)):
+    """
+    Valutazione di una policy casuale su griglie size x size: ciclo Python
+    (script.policyEvaluation) contro le versioni sul modello compilato
+    (script.policyEvaluationSparse con sweep, direct e gmres).
+    make_model(env) costruisce il GridModel dello script.
+    """
+    original_env = script.ENV
+    methods = ["sweep", "direct", "gmres"]
+    atol = 10 * script.TRESHOLD / (1 - script.GAMMA)
+    print(f"{'griglia':>9} {'loop (s)':>10}" + "".join(f" {m + ' (s)':>12}" for m in methods))
+
+    for size in loop_sizes + sparse_sizes:
+        env = random_env(size, size)
+        P = np.random.default_rng(1).integers(0, len(script.ACTIONS), size=(size, size)).astype(float)
+        model = make_model(env)
+
+        t_loop = None
+        if size in loop_sizes:
+            set_env(script, env)
+            start = time.perf_counter()
+            V_loop = script.policyEvaluation(np.zeros((size, size)), P)
+            t_loop = time.perf_counter() - start
+
+        times = []
+        for method in methods:
+            start = time.perf_counter()
+            V = script.policyEvaluationSparse(np.zeros((size, size)), P, model, method)
+            times.append(time.perf_counter() - start)
+            if t_loop is not None:
+                assert np.allclose(V, V_loop, atol=atol)
+
+        loop_str = "-" if t_loop is None else f"{t_loop:.4f}"
+        print(f"{size:>4}x{size:<4} {loop_str:>10}" + "".join(f" {t:>12.4f}" for t in times))
+
+    set_env(script, original_env)
@@ -1,5 +1,11 @@
+import os
+import sys
+import time
 import numpy as np
-from random import random, choice, randint
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grid_env import GridEnv
+from exploration import ExplorationNoise
 
 # --> ENVIRONMENT
 NUM_ROW = 4
@@ -19,58 +25,114 @@ ALPHA = 0.1    # Learning Rate
 GAMMA = 0.9    # Discount Factor
 EPSILON = 0.1  # Exploration Rate
 EPISODES = 1000 # Episodi da giocare
+SEED = 0        # Seed unico per tutta l'esplorazione
 
-def step(state, action_ixd):
-    r, c = state
-    move_r, move_c = ACTIONS[action_ixd]
-
-    next_r = r + move_r
-    next_c = c + move_c
+# --> IPERPARAMETRI VERSIONE BATCH
+NUM_ENVS = 4096   # Episodi portati avanti in parallelo
+BATCH_STEPS = 500 # Passi in lock-step di tutti gli ambienti
 
-    next_r = max(0, min(next_r, NUM_ROW - 1))
-    next_c = max(0, min(next_c, NUM_COL - 1))
+GRID = GridEnv(ENV, REWARD)
+NOISE = ExplorationNoise(NUM_ACTIONS, seed=SEED)
 
-    reward = ENV[next_r][next_c] + REWARD
-
-    done = False
-    if ENV[next_r][next_c] == 1 or ENV[next_r][next_c] == -1:
-        done = True
-    
-    return (next_r, next_c), reward, done
+def step(state, action_ixd):
+    # state e' l'indice piatto s = r * NUM_COL + c
+    return GRID.step(state, action_ixd)
 
 def choose_action(state, Q):
-    row, col = state
-
-    if random() < EPSILON:
-        action_idx = randint(0, NUM_ACTIONS - 1)
+    if NOISE.uniform() < EPSILON:
+        action_idx = NOISE.action()
     else:
-        action_idx = np.argmax(Q[row][col])
+        action_idx = np.argmax(Q[state])
 
     return action_idx
 
 def q_learning():
-    Q = np.zeros((NUM_ROW, NUM_COL, NUM_ACTIONS))
+    Q = np.zeros((GRID.num_states, NUM_ACTIONS))
 
     for episode in range(EPISODES):
-        state = (randint(0, NUM_ROW - 1), randint(0, NUM_COL - 1))
+        state = NOISE.rng.integers(GRID.num_states)
 
         while True:
             action_idx = choose_action(state, Q)
             next_state, reward, done = step(state, action_idx)
-            r, c = state
-            next_r, next_c = next_state
 
-            old_value = Q[r][c][action_idx]
-            next_max = max(Q[next_r][next_c])
+            old_value = Q[state, action_idx]
+            next_max = Q[next_state].max()
 
             new_value = old_value + ALPHA * (reward + GAMMA * next_max - old_value)
-            Q[r][c][action_idx] = new_value
+            Q[state, action_idx] = new_value
 
             state = next_state
 
             if done:
                 break
-    return Q
+    return Q.reshape(NUM_ROW, NUM_COL, NUM_ACTIONS)
+
+# --> Q-LEARNING BATCH (N AMBIENTI IN PARALLELO)
+
+def q_learning_batched(num_envs=NUM_ENVS, num_steps=BATCH_STEPS, seed=0):
+    """
+    Stessa regola di aggiornamento di q_learning, ma num_envs episodi avanzano
+    insieme come array NumPy. Sulle transizioni terminali il max_a' Q(s', a')
+    viene mascherato a zero e l'episodio riparte subito da uno stato casuale.
+    Se piu' ambienti aggiornano la stessa coppia (s, a) nello
+    stesso passo, si applica la media dei loro aggiornamenti.
+    """
+    rng = np.random.default_rng(seed)
+    next_state, rewards, dones = GRID.next_state, GRID.reward, GRID.done
+    num_states = GRID.num_states
+
+    Q = np.zeros((num_states, NUM_ACTIONS))
+    Q_flat = Q.ravel()
+    states = rng.integers(0, num_states, size=num_envs)
+
+    for _ in range(num_steps):
+        # Epsilon-greedy su tutti gli ambienti
+        greedy = np.argmax(Q[states], axis=1)
+        explore = rng.random(num_envs) < EPSILON
+        actions = np.where(explore, rng.integers(0, NUM_ACTIONS, size=num_envs), greedy)
+
+        next_states = next_state[states, actions]
+        reward = rewards[states, actions]
+        done = dones[states, actions]
+
+        # Aggiornamento TD con scatter (somma e conteggio per coppia s, a)
+        idx = states * NUM_ACTIONS + actions
+        next_max = np.where(done, 0.0, Q[next_states].max(axis=1))
+        td = reward + GAMMA * next_max - Q_flat[idx]
+        td_sum = np.bincount(idx, weights=td, minlength=Q_flat.size)
+        counts = np.bincount(idx, minlength=Q_flat.size)
+        Q_flat += ALPHA * td_sum / np.maximum(counts, 1)
+
+        # Auto-reset degli episodi terminati
+        states = np.where(done, rng.integers(0, num_states, size=num_envs), next_states)
+
+    return Q.reshape(NUM_ROW, NUM_COL, NUM_ACTIONS)
+
+def benchmark():
+    global step
+    scalar_step = step
+    num_steps = [0]
+
+    def counted_step(state, action_ixd):
+        num_steps[0] += 1
+        return scalar_step(state, action_ixd)
+
+    step = counted_step
+    start = time.perf_counter()
+    q_learning()
+    t_scalar = time.perf_counter() - start
+    step = scalar_step
+    scalar_rate = num_steps[0] / t_scalar
+    print(f"Scalare: {num_steps[0]} passi in {t_scalar:.3f}s -> {scalar_rate:,.0f} passi/s")
+
+    for num_envs in (256, 4096, 16384):
+        start = time.perf_counter()
+        q_learning_batched(num_envs, BATCH_STEPS)
+        t_batch = time.perf_counter() - start
+        rate = num_envs * BATCH_STEPS / t_batch
+        print(f"Batch ({num_envs} ambienti): {num_envs * BATCH_STEPS} passi in {t_batch:.3f}s "
+              f"-> {rate:,.0f} passi/s ({rate / scalar_rate:.0f}x)")
 
 def print_policy(Q):
     # Mappatura indici -> simboli freccia
@@ -97,8 +159,15 @@ def print_policy(Q):
     print("-------------------------------------------")
 
 def main():
-    Q = q_learning()
+    if len(sys.argv) > 1 and sys.argv[1] == "batched":
+        Q = q_learning_batched()
+    else:
+        Q = q_learning()
     # print_policy(Q)
     print(Q)
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        benchmark()
+    else:
+        main()
@@ -1,5 +1,10 @@
+import os
+import sys
 import numpy as np
-from random import random, randint
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from grid_env import GridEnv
+from exploration import ExplorationNoise
 
 # --> ENV
 NUM_ROW = 4
@@ -20,57 +25,44 @@ EPSILON = 0.1
 ALPHA = 0.1
 
 EPISODES = 5000
+SEED = 0
 
-def step(state, action_idx):
-    r, c = state
-    move_r, move_c = ACTIONS[action_idx]
-
-    next_r = r + move_r
-    next_r = max(0, min(next_r, NUM_ROW - 1))
-
-    next_c = c + move_c
-    next_c = max(0, min(next_c, NUM_COL -1))
+GRID = GridEnv(ENV, REWARD)
+NOISE = ExplorationNoise(NUM_ACTIONS, seed=SEED)
 
-    reward = ENV[next_r][next_c] + REWARD
-
-    done = False
-    if ENV[next_r][next_c] == 1 or ENV[next_r][next_c] == -1:
-        done = True
-
-    return (next_r, next_c), reward, done
+def step(state, action_idx):
+    # state e' l'indice piatto s = r * NUM_COL + c
+    return GRID.step(state, action_idx)
 
 def choose_action(state, Q):
-    r, c = state
-
-    if random() < EPSILON:
-        action_idx = randint(0, NUM_ACTIONS - 1)
+    if NOISE.uniform() < EPSILON:
+        action_idx = NOISE.action()
     else:
-        action_idx = np.argmax(Q[r][c])
+        action_idx = np.argmax(Q[state])
 
     return action_idx
 
 def q_learning(Q):
     for episode in range(EPISODES):
-        state = (randint(0, NUM_ROW - 1), randint(0, NUM_COL - 1))
+        state = NOISE.rng.integers(GRID.num_states)
 
         while True:
-            r, c = state
             action_idx = choose_action(state, Q)
-            (next_r, next_c), reward, done = step(state, action_idx)
+            next_state, reward, done = step(state, action_idx)
 
-            old_val = Q[r][c][action_idx]
-            next_max = max(Q[next_r][next_c])
+            old_val = Q[state, action_idx]
+            next_max = Q[next_state].max()
 
             new_val = old_val + ALPHA * (reward + GAMMA * next_max - old_val)
-            Q[r][c][action_idx] = new_val
+            Q[state, action_idx] = new_val
 
-            state = (next_r, next_c)
+            state = next_state
 
             if done:
                 break
     return Q
 
 def main():
-    Q = np.zeros((NUM_ROW, NUM_COL, NUM_ACTIONS))
+    Q = np.zeros((GRID.num_states, NUM_ACTIONS))
     Q = q_learning(Q)
-    print(Q)
\ No newline at end of file
+    print(Q.reshape(NUM_ROW, NUM_COL, NUM_ACTIONS))
\ No newline at end of file
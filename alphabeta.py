@@ -0,0 +1,184 @@
+import sys
+import time
+import numpy as np
+from mnk_board import MNKBoard
+
+# Tipo di valore salvato nella tabella delle trasposizioni
+EXACT, LOWER, UPPER = 0, 1, 2
+
+class AlphaBetaSolver:
+    """
+    Minimax con potatura alpha-beta (in forma negamax) per m,n,k-game,
+    cioè gioco ottimo contro un avversario ottimo (TicTacToeDP invece
+    ottimizza contro l'avversario casuale).
+
+    Le posizioni sono due maschere di bit (giocatore di turno, avversario);
+    dopo una mossa si controllano solo le linee passanti per la casella
+    giocata. Il punteggio è +(caselle libere + 1) per una vittoria di chi
+    muove (vincere prima vale di più), 0 per il pareggio.
+
+    Tabella delle trasposizioni: hash di Zobrist (un numero casuale per
+    casella e giocatore, combinati con xor), table_size voci (potenza di 2)
+    indirizzate dai bit bassi dell'hash. Ogni voce tiene hash completo,
+    valore, tipo di limite, profondità (caselle libere), mossa migliore e
+    l'età della ricerca. Sostituzione: una voce della ricerca corrente
+    viene sovrascritta solo da un sottoalbero almeno altrettanto profondo;
+    le voci di ricerche precedenti sono sempre sostituibili.
+    """
+
+    def __init__(self, rows=3, cols=3, k=3, table_size=2 ** 20, seed=0):
+        if table_size & (table_size - 1):
+            raise ValueError("table_size deve essere una potenza di 2")
+        self.rules = MNKBoard(rows, cols, k)
+        self.size = self.rules.size
+        self.full = (1 << self.size) - 1
+
+        rng = np.random.default_rng(seed)
+        self.zobrist = rng.integers(1, 2 ** 62, size=(2, self.size)).tolist()
+
+        self.table_size = table_size
+        self.table_mask = table_size - 1
+        self.keys = [-1] * table_size # nessun hash e' negativo: voce vuota
+        self.values = [0] * table_size
+        self.flags = [EXACT] * table_size
+        self.depths = [-1] * table_size
+        self.moves = [-1] * table_size
+        self.ages = [0] * table_size
+        self.age = 0
+
+        # Ordinamento statico delle mosse: prima le caselle su più linee (il centro)
+        num_lines = [len(lines) for lines in self.rules.cell_lines]
+        self.order = sorted(range(self.size), key=lambda cell: -num_lines[cell])
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.nodes = 0
+        self.probes = 0
+        self.hits = 0
+        self.cutoffs = 0
+        self.search_time = 0.0
+
+    ## ------------------------------------------------------------------
+    ## RICERCA
+    ## ------------------------------------------------------------------
+
+    def _search(self, me, opp, side, empties, alpha, beta, key):
+        # side: 0 se muove X, 1 se muove O (indice nelle chiavi di Zobrist)
+        self.nodes += 1
+        if empties == 0:
+            return 0
+
+        alpha_orig = alpha
+        slot = key & self.table_mask
+        self.probes += 1
+        tt_move = -1
+        if self.keys[slot] == key:
+            self.hits += 1
+            value, flag = self.values[slot], self.flags[slot]
+            if flag == EXACT:
+                return value
+            if flag == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+            tt_move = self.moves[slot]
+
+        free = self.full & ~(me | opp)
+        moves = [cell for cell in self.order if free >> cell & 1]
+
+        # Mosse forzate: una vittoria immediata chiude il nodo; se l'avversario
+        # minaccia di vincere bisogna parare, e con due minacce si perde
+        completes_line = self.rules.completes_line
+        threats = []
+        for cell in moves:
+            if completes_line(me | (1 << cell), cell):
+                self._store(slot, key, empties, EXACT, empties, cell)
+                return empties
+            if completes_line(opp | (1 << cell), cell):
+                threats.append(cell)
+        if len(threats) > 1:
+            self._store(slot, key, -(empties - 1), EXACT, empties, threats[0])
+            return -(empties - 1)
+        if threats:
+            moves = threats
+
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+
+        best, best_move = -self.size - 1, moves[0]
+        zobrist = self.zobrist[side]
+        for cell in moves:
+            # Nessuna mossa vince subito (controllato sopra): si scende nell'albero
+            score = -self._search(opp, me | (1 << cell), 1 - side, empties - 1, -beta, -alpha, key ^ zobrist[cell])
+            if score > best:
+                best, best_move = score, cell
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                self.cutoffs += 1
+                break
+
+        flag = UPPER if best <= alpha_orig else LOWER if best >= beta else EXACT
+        self._store(slot, key, best, flag, empties, best_move)
+        return best
+
+    def _store(self, slot, key, value, flag, depth, move):
+        # Sostituzione: una voce della ricerca corrente resta se è più profonda
+        if self.keys[slot] == key or self.ages[slot] != self.age or self.depths[slot] <= depth:
+            self.keys[slot] = key
+            self.values[slot] = value
+            self.flags[slot] = flag
+            self.depths[slot] = depth
+            self.moves[slot] = move
+            self.ages[slot] = self.age
+
+    def _position(self, code):
+        board = self.rules.decode(code)
+        x_mask = sum(1 << cell for cell in np.flatnonzero(board == 1).tolist())
+        o_mask = sum(1 << cell for cell in np.flatnonzero(board == -1).tolist())
+        key = 0
+        for cell in np.flatnonzero(board == 1).tolist():
+            key ^= self.zobrist[0][cell]
+        for cell in np.flatnonzero(board == -1).tolist():
+            key ^= self.zobrist[1][cell]
+        return x_mask, o_mask, key
+
+    def solve(self, code):
+        """
+        Mossa migliore e valore (per chi muove) della griglia code;
+        None come mossa se la partita è già finita
+        """
+        x_mask, o_mask, key = self._position(code)
+        side = 0 if bin(x_mask).count("1") == bin(o_mask).count("1") else 1
+        me, opp = (x_mask, o_mask) if side == 0 else (o_mask, x_mask)
+        empties = self.size - bin(x_mask | o_mask).count("1")
+        if empties == 0 or int(self.rules.winner(np.array([code]))[0]) != 0:
+            return None, 0
+
+        self.age += 1
+        start = time.perf_counter()
+        value = self._search(me, opp, side, empties, -self.size - 1, self.size + 1, key)
+        self.search_time += time.perf_counter() - start
+        return self.moves[key & self.table_mask], value
+
+    def best_move(self, code):
+        """Sorgente di policy per TicTacToeDP.play_game: griglia -> casella"""
+        return self.solve(code)[0]
+
+    def report(self):
+        used = sum(1 for depth in self.depths if depth >= 0)
+        rate = self.nodes / self.search_time if self.search_time else 0.0
+        print(f"Nodi: {self.nodes}  ({rate:,.0f} nodi/s)  tagli: {self.cutoffs}")
+        print(f"Tabella: {self.hits}/{self.probes} hit ({100 * self.hits / max(1, self.probes):.1f}%), "
+              f"{used}/{self.table_size} voci occupate")
+
+if __name__ == "__main__":
+    # "python alphabeta.py 4 4 3": valore della griglia vuota con gioco ottimo
+    rows, cols, k = (int(x) for x in sys.argv[1:4]) if len(sys.argv) > 3 else (3, 3, 3)
+    solver = AlphaBetaSolver(rows, cols, k)
+    move, value = solver.solve(0)
+    outcome = "vince X" if value > 0 else "vince O" if value < 0 else "pareggio"
+    print(f"{rows}x{cols} k={k}: {outcome} (punteggio {value}), prima mossa: {move}, tempo: {solver.search_time:.2f} s")
+    solver.report()
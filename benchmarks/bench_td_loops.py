@@ -0,0 +1,252 @@
+"""
+Benchmark del ciclo interno epsilon-greedy + aggiornamento TD del repo.
+
+Ogni kernel esegue per un numero fisso di passi, con seed fissi, il codice
+usato da uno script:
+
+    grid_qlearning   Q-learning/q-learning.py: q_learning su GridEnv con
+                     ExplorationNoise
+    notebook_1d      notebook d'esame, parte 1 (griglia 1D): ciclo ripetuto
+                     qui, un notebook non si puo' importare
+    cliff_qlearning  labSARSA/cliffQL.py: td_control.tdControl su TabularEnv
+    cliff_sarsa      labSARSA/cliffSARSA.py: tdControl ("sarsa") su TabularEnv
+                     troncato a MAX_STEPS passi
+    taxi             taxi.py: addestra su TabularEnv("Taxi-v3"), seed divisi
+                     con split_seed come nello script
+    cliff_fused      riferimento ottimizzato: ciclo fuso su liste Python con
+                     numeri casuali pre-estratti, stessa dinamica di cliff_qlearning
+
+I kernel che chiamano il codice degli script ripetono addestramenti completi
+(EPISODES episodi, come negli script; TAXI_EPISODES per taxi) finche' non
+superano il numero di passi richiesto; i passi si contano con sottoclassi di
+TabularEnv e GridEnv.
+
+Uso:
+    python benchmarks/bench_td_loops.py                   # passi/s
+    python benchmarks/bench_td_loops.py --save base.json  # salva un riferimento
+    python benchmarks/bench_td_loops.py --compare base.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import importlib
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "labSARSA"))
+sys.path.append(os.path.join(ROOT, "Q-learning"))
+from grid_env import GridEnv
+from exploration import ExplorationNoise, split_seed
+from tabular_envs import TabularEnv
+from td_control import tdControl
+import taxi as taxi_script
+qlearning_script = importlib.import_module("q-learning") # nome con il trattino
+
+NUM_STEPS = 20000
+REPEATS = 3
+SEED = 0
+
+# Configurazione di cliffQL.py
+CLIFF_ALPHA, CLIFF_GAMMA = 0.9, 0.5
+CLIFF_EPISODES = 500
+CLIFF_EPSILON_START = 1
+CLIFF_EPSILON_DECAY = CLIFF_EPSILON_START / (CLIFF_EPISODES / 2)
+# Differenze di cliffSARSA.py
+SARSA_ALPHA, SARSA_GAMMA = 0.1, 1.0
+SARSA_EPSILON_MIN = 0.1
+SARSA_MAX_STEPS = 1000
+# Episodi per addestramento di taxi: i primi episodi (epsilon vicino a 1)
+# arrivano quasi tutti al limite di 200 passi
+TAXI_EPISODES = 100
+
+class CountingEnv(TabularEnv):
+    """TabularEnv che conta i passi eseguiti (una somma in piu' per passo)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.total_steps = 0
+
+    def step(self, action):
+        self.total_steps += 1
+        return super().step(action)
+
+class CountingGridEnv(GridEnv):
+    """GridEnv che conta i passi eseguiti"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.total_steps = 0
+
+    def step(self, s, a):
+        self.total_steps += 1
+        return super().step(s, a)
+
+## ------------------------------------------------------------------
+## KERNEL (ognuno restituisce il numero di passi eseguiti)
+## ------------------------------------------------------------------
+
+def grid_qlearning(num_steps, seed):
+    """Addestramenti completi di q_learning finche' non si superano num_steps passi"""
+    script = qlearning_script
+    original = script.GRID, script.NOISE
+    grid = CountingGridEnv(script.ENV, script.REWARD)
+    # q_learning legge griglia e rumore dalle variabili globali dello script
+    script.GRID = grid
+    script.NOISE = ExplorationNoise(script.NUM_ACTIONS, seed=seed)
+    while grid.total_steps < num_steps:
+        script.q_learning()
+    script.GRID, script.NOISE = original
+    return grid.total_steps
+
+def notebook_1d(num_steps, seed):
+    random.seed(seed)
+    REWARD = [-1, 0, 0, 0, 0, 1]
+    nb_state, nb_action = 6, 2
+    cost, alpha, gamma = 0.01, 0.9, 0.5
+    QTable = np.zeros((nb_state, nb_action))
+
+    steps = 0
+    epsilon = 1.0
+    while steps < num_steps:
+        state = 2
+        while steps < num_steps:
+            if random.random() < epsilon:
+                action_idx = random.randint(0, nb_action - 1)
+            else:
+                action_idx = np.argmax(QTable[state])
+            next_state = max(0, min(state + (-1 if action_idx == 0 else 1), nb_state - 1))
+            act_reward = REWARD[next_state] - cost
+            isTerminated = REWARD[next_state] == -1 or REWARD[next_state] == 1
+
+            old_val = QTable[state][action_idx]
+            next_max = max(QTable[next_state])
+            QTable[state][action_idx] = old_val + alpha * (act_reward + gamma * next_max - old_val)
+
+            state = next_state
+            steps += 1
+            if isTerminated:
+                break
+        epsilon = max(0, epsilon - 0.01)
+    return steps
+
+def _cliff_td(method, num_steps, seed, alpha, gamma, epsilon_min=0, max_episode_steps=None):
+    """Addestramenti completi di tdControl su CliffWalking finche' non si superano num_steps passi"""
+    env = CountingEnv('CliffWalking-v1', max_episode_steps=max_episode_steps)
+    while env.total_steps < num_steps:
+        QTable = np.zeros((env.observation_space.n, env.action_space.n))
+        tdControl(QTable, env, method, CLIFF_EPISODES, alpha, gamma,
+                  CLIFF_EPSILON_START, CLIFF_EPSILON_DECAY, seed=seed, epsilon_min=epsilon_min)
+    return env.total_steps
+
+def cliff_qlearning(num_steps, seed):
+    return _cliff_td("qlearning", num_steps, seed, CLIFF_ALPHA, CLIFF_GAMMA)
+
+def cliff_sarsa(num_steps, seed):
+    return _cliff_td("sarsa", num_steps, seed, SARSA_ALPHA, SARSA_GAMMA,
+                     epsilon_min=SARSA_EPSILON_MIN, max_episode_steps=SARSA_MAX_STEPS)
+
+def taxi(num_steps, seed):
+    """Addestramenti di taxi.addestra (TAXI_EPISODES episodi) finche' non si superano num_steps passi"""
+    env = CountingEnv("Taxi-v3")
+    seed_ambiente, seed_rumore = split_seed(seed)
+    rumore = ExplorationNoise(env.action_space.n, seed=seed_rumore)
+    while env.total_steps < num_steps:
+        q_table = np.zeros((env.observation_space.n, env.action_space.n))
+        taxi_script.addestra(env, q_table, TAXI_EPISODES, taxi_script.max_epsilon, rumore, seed_ambiente)
+    env.close()
+    return env.total_steps
+
+def cliff_fused(num_steps, seed):
+    """
+    Stesso MDP e iperparametri di cliff_qlearning con il ciclo fuso: le
+    transizioni (deterministiche) lette una volta dagli array di TabularEnv
+    in liste, Q come lista di liste, numeri casuali estratti tutti all'inizio.
+    """
+    env = TabularEnv('CliffWalking-v1')
+    start_state = int(np.argmax(env.initial_cdf > 0))
+    num_actions = env.action_space.n
+    next_state = env.next_state[:, :, 0].tolist()
+    reward = env.reward[:, :, 0].tolist()
+    done = env.terminated[:, :, 0].tolist()
+
+    rng = np.random.default_rng(seed)
+    uniforms = rng.random(num_steps).tolist()
+    random_actions = rng.integers(0, num_actions, size=num_steps).tolist()
+
+    alpha, gamma = CLIFF_ALPHA, CLIFF_GAMMA
+    epsilon, epsilon_decay = 1.0, CLIFF_EPSILON_DECAY
+    Q = [[0.0] * num_actions for _ in range(len(next_state))]
+    actions = range(num_actions)
+
+    state = start_state
+    for t in range(num_steps):
+        q_s = Q[state]
+        if uniforms[t] < epsilon:
+            action = random_actions[t]
+        else:
+            action = max(actions, key=q_s.__getitem__)
+        s_next = next_state[state][action]
+
+        q_s[action] += alpha * (reward[state][action] + gamma * max(Q[s_next]) - q_s[action])
+
+        if done[state][action]:
+            state = start_state
+            epsilon = max(0.0, epsilon - epsilon_decay)
+        else:
+            state = s_next
+    return num_steps
+
+KERNELS = {
+    "grid_qlearning": grid_qlearning,
+    "notebook_1d": notebook_1d,
+    "cliff_qlearning": cliff_qlearning,
+    "cliff_sarsa": cliff_sarsa,
+    "taxi": taxi,
+    "cliff_fused": cliff_fused,
+}
+
+## ------------------------------------------------------------------
+## RUNNER
+## ------------------------------------------------------------------
+
+def measure(kernel, num_steps=NUM_STEPS, repeats=REPEATS, seed=SEED):
+    """Passi/secondo, il migliore su repeats esecuzioni (costruzione dell'ambiente inclusa)"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        steps = kernel(num_steps, seed)
+        best = min(best, time.perf_counter() - start)
+    return steps / best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=NUM_STEPS)
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--only", nargs="*", choices=list(KERNELS), default=list(KERNELS))
+    parser.add_argument("--save", help="scrive i passi/s in questo file JSON")
+    parser.add_argument("--compare", help="confronto con un file JSON scritto da --save")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = {}
+    print(f"{'kernel':<18} {'passi/s':>12} {'vs riferimento':>15}")
+    for name in args.only:
+        rate = measure(KERNELS[name], args.steps, args.repeats)
+        results[name] = rate
+        change = f"{100 * (rate / baseline[name] - 1):+.1f}%" if name in baseline else "-"
+        print(f"{name:<18} {rate:>12,.0f} {change:>15}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import os
+import sys
+import json
+import time
+import zlib
+import itertools
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from grid_env import GridEnv
+from exploration import ExplorationNoise
+
+# --> GRID WORLD 2D (come nella parte 2/3 del notebook)
+ROWS = 3
+COLS = 4
+nb_action = 4
+WALL = (1, 1)
+
+REWARD_MAP = np.zeros((ROWS, COLS))
+REWARD_MAP[0, 3] = 1
+REWARD_MAP[1, 3] = -1
+
+cost = 0.01
+GRID = GridEnv(REWARD_MAP, -cost, walls=[WALL])
+START = GRID.encode(2, 0)
+MAX_STEPS = 1000 # limite di sicurezza per episodio
+
+RESULTS_FILE = "sweep_results.jsonl"
+
+def step(state, QTable, epsilon, noise):
+    if noise.uniform() < epsilon:
+        action_idx = noise.action()
+    else:
+        action_idx = np.argmax(QTable[state])
+
+    next_state, act_reward, isTerminated = GRID.step(state, action_idx)
+    return action_idx, next_state, act_reward, isTerminated
+
+def run(alpha, gamma, epsilon_start, epsilon_decay, episodes, seed=0):
+    """
+    Un esperimento completo di Q-learning. Restituisce la curva del reward
+    totale per episodio e la QTable finale.
+    """
+    noise = ExplorationNoise(nb_action, seed=seed)
+    QTable = np.zeros((GRID.num_states, nb_action))
+    total_rewards = []
+
+    epsilon = epsilon_start
+    for episode in range(episodes):
+        state = START
+        total_reward = 0.0
+
+        for _ in range(MAX_STEPS):
+            action_idx, next_state, act_reward, isTerminated = step(state, QTable, epsilon, noise)
+
+            old_val = QTable[state, action_idx]
+            next_max = QTable[next_state].max()
+            QTable[state, action_idx] = old_val + alpha * (act_reward + gamma * next_max - old_val)
+
+            total_reward += float(act_reward)
+            state = next_state
+
+            if isTerminated:
+                break
+
+        total_rewards.append(total_reward)
+        epsilon = max(0, epsilon - epsilon_decay)
+
+    return total_rewards, QTable.reshape(ROWS, COLS, nb_action)
+
+# --> SWEEP SU PROCESS POOL
+
+def make_grid(alphas, gammas, epsilon_starts, epsilon_decays, episodes):
+    keys = ["alpha", "gamma", "epsilon_start", "epsilon_decay", "episodes"]
+    values = itertools.product(alphas, gammas, epsilon_starts, epsilon_decays, episodes)
+    return [dict(zip(keys, v)) for v in values]
+
+def config_key(config):
+    return json.dumps(config, sort_keys=True)
+
+def config_seed(config, base_seed):
+    # Il seed dipende solo dalla configurazione, non dal worker che la esegue:
+    # lo stesso sweep da' gli stessi risultati con qualunque numero di processi
+    return zlib.crc32(f"{base_seed}:{config_key(config)}".encode())
+
+def run_config(config, base_seed):
+    seed = config_seed(config, base_seed)
+    start = time.perf_counter()
+    curve, QTable = run(**config, seed=seed)
+    return {
+        "key": config_key(config),
+        "config": config,
+        "seed": seed,
+        "curve": curve,
+        "qtable": QTable.tolist(),
+        "wall_time": time.perf_counter() - start,
+    }
+
+def load_results(path=RESULTS_FILE):
+    """Legge i risultati gia' salvati; una riga troncata da un'interruzione viene ignorata."""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path) as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            results[result["key"]] = result
+    return results
+
+def drop_partial_line(path, block_size=65536):
+    """
+    Tronca il file dopo l'ultimo a capo: una riga lasciata a meta' da un'interruzione
+    verrebbe altrimenti incollata al primo risultato scritto in append.
+    Cerca all'indietro a blocchi, senza rileggere tutto il file.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            start = max(0, pos - block_size)
+            f.seek(start)
+            newline = f.read(pos - start).rfind(b"\n")
+            if newline >= 0:
+                cut = start + newline + 1
+                break
+            pos = start
+        else:
+            cut = 0
+        if cut < end:
+            f.truncate(cut)
+
+def run_sweep(configs, path=RESULTS_FILE, workers=None, base_seed=0):
+    """
+    Esegue le configurazioni su un process pool, scrivendo ogni risultato
+    appena completato (una riga JSON). Le configurazioni gia' presenti nel
+    file vengono saltate, quindi uno sweep interrotto riprende da dove era.
+    """
+    results = load_results(path)
+    pending = [c for c in configs if config_key(c) not in results]
+    print(f"Configurazioni: {len(configs)} totali, {len(configs) - len(pending)} gia' completate")
+    if not pending:
+        return results
+
+    drop_partial_line(path)
+    start = time.perf_counter()
+    with open(path, "a") as f, ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_config, c, base_seed) for c in pending]
+        try:
+            for i, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                f.write(json.dumps(result) + "\n")
+                f.flush()
+                results[result["key"]] = result
+
+                if i % 50 == 0 or i == len(pending):
+                    print(f"{i}/{len(pending)} completate ({time.perf_counter() - start:.1f}s)")
+        except KeyboardInterrupt:
+            print("Interrotto: i risultati completati sono salvati, rilanciare per riprendere.")
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    return results
+
+def plot_results(results, top=10):
+    import matplotlib.pyplot as plt
+
+    # Le configurazioni con il reward medio piu' alto nell'ultimo 10% degli episodi
+    def final_score(result):
+        curve = result["curve"]
+        return np.mean(curve[-max(1, len(curve) // 10):])
+
+    best = sorted(results.values(), key=final_score, reverse=True)[:top]
+    for result in best:
+        c = result["config"]
+        label = f"a={c['alpha']} g={c['gamma']} e0={c['epsilon_start']} d={c['epsilon_decay']}"
+        plt.plot(result["curve"], label=label)
+
+    plt.xlabel("Episodio")
+    plt.ylabel("Reward totale")
+    plt.legend(fontsize="small")
+    plt.show()
+
+def main():
+    configs = make_grid(alphas=[0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0],
+                        gammas=[0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.99],
+                        epsilon_starts=[1.0],
+                        epsilon_decays=[0.005, 0.01, 0.02, 0.05, 0.1,
+                                        0.2, 0.3, 0.5, 0.75, 1.0],
+                        episodes=[100])
+    results = run_sweep(configs)
+
+    if len(sys.argv) > 1 and sys.argv[1] == "plot":
+        plot_results(results)
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,17 @@
 # your code here
+import os
+import sys
 import numpy as np
-from random import random, randint
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+from grid_env import GridEnv
+from exploration import ExplorationNoise
 
 ROWS = 3
 COLS = 4
 nb_action = 4
 
-QTable = np.zeros((ROWS, COLS, nb_action))
-WALL = [1, 1]
+WALL = (1, 1)
 
 REWARD_MAP = np.zeros((ROWS, COLS))
 REWARD_MAP[0, 3] = 1   
@@ -20,54 +24,37 @@ gamma = 0.5
 EPSILON_START = 1
 EPSILON_DECAY = 0.01
 EPISODES = 100
+SEED = 0
 
-def step(state, QTable, epsilon):
-    row, col = state
+# Stati come indice piatto s = r * COLS + c, muro e terminali precalcolati
+GRID = GridEnv(REWARD_MAP, -cost, walls=[WALL])
+QTable = np.zeros((GRID.num_states, nb_action))
+START = GRID.encode(2, 0)
+NOISE = ExplorationNoise(nb_action, seed=SEED)
 
-    if random() < epsilon:
-        action_idx = randint(0, nb_action - 1)
+def step(state, QTable, epsilon):
+    if NOISE.uniform() < epsilon:
+        action_idx = NOISE.action()
     else:
-        action_idx = np.argmax(QTable[row][col])
-
-    actions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-    move_r, move_c = actions[action_idx]
-
-    next_r = row + move_r
-    next_c = col + move_c
-    next_r = max(0, min(next_r, ROWS - 1))
-    next_c = max(0, min(next_c, COLS - 1))
-
-    if next_r == WALL[0] AND next_c == WALL[1]:
-        next_r = row
-        next_c = col
-
-    next_state = (next_r, next_c)
-
-    act_reward = REWARD_MAP[next_r][next_c] - cost
+        action_idx = np.argmax(QTable[state])
 
-    isTerminated = False
-    if REWARD_MAP[next_r][next_c] = -1 or REWARD_MAP[next_r][next_c] = 1:
-        isTerminated = True
+    next_state, act_reward, isTerminated = GRID.step(state, action_idx)
 
     return action_idx, next_state, act_reward, isTerminated
 
 def qLearning(QTable):
     epsilon = EPSILON_START
     for episode in range(EPISODES):
-        state = (2, 0)
+        state = START
 
         while True:
             action_idx, next_state, act_reward, isTerminated = step(state, QTable, epsilon)
-            r = state[0]
-            c = state[1]
-            next_r = next_state[0]
-            next_c = next_col[1]
 
-            old_val = QTable[r][c][action_idx]
-            next_max = max(QTable[next_r][next_c])
+            old_val = QTable[state, action_idx]
+            next_max = QTable[next_state].max()
 
             new_val = old_val + alpha * (act_reward + gamma * next_max - old_val)
-            QTable[r][c][action_idx] = new_val
+            QTable[state, action_idx] = new_val
 
             state = next_state
 
@@ -81,6 +68,6 @@ def qLearning(QTable):
 
 def main():
     Q =qLearning(QTable)
-    print(Q)
+    print(Q.reshape(ROWS, COLS, nb_action))
 
-main()
\ No newline at end of file
+main()
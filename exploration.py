@@ -0,0 +1,39 @@
+import numpy as np
+
+BLOCK_SIZE = 65536
+
+def _stream(draw_block):
+    # Generatore infinito: un nuovo blocco viene estratto solo quando il precedente e' esaurito
+    while True:
+        yield from draw_block().tolist()
+
+def split_seed(seed, n=2):
+    """
+    n seed interi indipendenti derivati da uno solo (SeedSequence.spawn), ad
+    esempio uno per l'ambiente e uno per l'esplorazione: passando lo stesso
+    seed a entrambi, i due default_rng estrarrebbero la stessa sequenza
+    """
+    return [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(n)]
+
+class ExplorationNoise:
+    """
+    Rumore di esplorazione pre-estratto a blocchi da un unico Generator NumPy.
+
+    uniform() restituisce il prossimo float in [0, 1), action() la prossima
+    azione casuale in [0, num_actions). Entrambi leggono da liste Python
+    riempite di block_size valori alla volta, quindi il costo per passo e'
+    una sola chiamata senza passare dal modulo random. Con lo stesso seed
+    la sequenza (e quindi l'intero addestramento) e' riproducibile.
+
+    Liste e non array perche' nei cicli scalari indicizzare una lista Python
+    costa molto meno che indicizzare un array NumPy (ogni accesso crea uno
+    scalare NumPy): per lo stesso motivo i cicli scalari del repo lavorano
+    su copie .tolist() delle tabelle (TabularEnv, tictactoe_board, ...).
+    """
+
+    def __init__(self, num_actions, seed=None, block_size=BLOCK_SIZE):
+        self.num_actions = num_actions
+        self.rng = np.random.default_rng(seed)
+
+        self.uniform = _stream(lambda: self.rng.random(block_size)).__next__
+        self.action = _stream(lambda: self.rng.integers(0, num_actions, size=block_size)).__next__
@@ -0,0 +1,45 @@
+import numpy as np
+
+ACTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)] # su, giu, sx, dx
+
+class GridEnv:
+    """
+    Grid world con stati codificati come un solo intero s = r * cols + c.
+
+    Le dinamiche sono precalcolate in array (S, A): next_state (int32),
+    reward (float) e done (bool). Muoversi fuori dalla griglia o contro un
+    muro lascia l'agente dove si trova; entrare in una cella con reward +1/-1
+    termina l'episodio. Il reward di ogni passo e' reward_map[s'] + step_reward.
+    """
+
+    def __init__(self, reward_map, step_reward, walls=()):
+        reward_map = np.asarray(reward_map, dtype=float)
+        self.rows, self.cols = reward_map.shape
+        self.num_states = self.rows * self.cols
+        self.num_actions = len(ACTIONS)
+        self.walls = [self.encode(r, c) for r, c in walls]
+
+        rows, cols = np.indices(reward_map.shape)
+        self.next_state = np.empty((self.num_states, self.num_actions), dtype=np.int32)
+        for a, (move_r, move_c) in enumerate(ACTIONS):
+            next_r = np.clip(rows + move_r, 0, self.rows - 1)
+            next_c = np.clip(cols + move_c, 0, self.cols - 1)
+            self.next_state[:, a] = (next_r * self.cols + next_c).ravel()
+
+        # Contro un muro si resta fermi
+        stay = np.repeat(np.arange(self.num_states, dtype=np.int32)[:, None], self.num_actions, axis=1)
+        blocked = np.isin(self.next_state, self.walls)
+        self.next_state[blocked] = stay[blocked]
+
+        cell_reward = reward_map.ravel()
+        self.reward = cell_reward[self.next_state] + step_reward
+        self.done = np.abs(cell_reward[self.next_state]) == 1
+
+    def encode(self, r, c):
+        return r * self.cols + c
+
+    def decode(self, s):
+        return divmod(s, self.cols)
+
+    def step(self, s, a):
+        return self.next_state[s, a], self.reward[s, a], self.done[s, a]
@@ -1,7 +1,12 @@
+import os
+import sys
 import numpy as np
-from random import random
 import gymnasium as gym
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from tabular_envs import TabularEnv
+from td_control import tdControl
+
 env = gym.make('CliffWalking-v1')
 state_space = env.observation_space.n 
 action_space = env.action_space.n
@@ -15,46 +20,22 @@ gamma = 0.5
 EPISODES = 500
 EPSILON_START = 1
 EPSILON_DECAY = EPSILON_START / (EPISODES / 2)
+SEED = 0
 
 def qLearning(QTable, env):
-    epsilon = EPSILON_START
-    
-    for episode in range(EPISODES):
-        state, info = env.reset()
-        
-        while True:
-            if random() < epsilon:
-                action = env.action_space.sample()
-            else:
-                action = np.argmax(QTable[state]) 
-            
-            next_state, reward, terminated, truncated, info = env.step(action)
-
-            old_val = QTable[state, action]
-            next_max = np.max(QTable[next_state])
-
-            new_val = old_val + alpha * (reward + gamma * next_max - old_val)
-            QTable[state, action] = new_val
-
-            state = next_state
-            
-            if terminated or truncated:
-                break
-        
-        if epsilon > 0:
-            epsilon -= EPSILON_DECAY
-            epsilon = max(0, epsilon) 
-
-    return QTable
+    # Ciclo comune con SARSA / Expected SARSA (td_control.py)
+    return tdControl(QTable, env, "qlearning", EPISODES, alpha, gamma,
+                     EPSILON_START, EPSILON_DECAY, seed=SEED)
 
 def main():
-    # Carichiamo l'ambiente. 
+    # Carichiamo l'ambiente come simulatore tabellare (stessa dinamica di gymnasium,
+    # senza lo stack di wrapper ad ogni passo).
     # Nota: Se 'CliffWalking-v1' da errore, usa 'CliffWalking-v0' (lo standard attuale)
     try:
-        env = gym.make('CliffWalking-v1') 
+        env = TabularEnv('CliffWalking-v1') 
     except:
         print("Versione v1 non trovata, utilizzo CliffWalking-v0")
-        env = gym.make('CliffWalking-v0')
+        env = TabularEnv('CliffWalking-v0')
 
     # Dimensioni dinamiche dall'ambiente
     state_space = env.observation_space.n # 48 stati
@@ -1,7 +1,13 @@
+import os
+import sys
+import time
 import numpy as np
-from random import random
 import gymnasium as gym
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from tabular_envs import TabularEnv
+from td_control import METHODS, tdControl, tdControlBatched
+
 env = gym.make('CliffWalking-v1')
 state_space = env.observation_space.n 
 action_space = env.action_space.n
@@ -9,56 +15,62 @@ action_space = env.action_space.n
 QTable = np.zeros((state_space, action_space))
 
 cost = 0.01
-alpha = 0.9
-gamma = 0.5
+# Come nell'esempio del cliff di Sutton & Barto (6.6): compito episodico non
+# scontato e passo piu' piccolo di cliffQL.py. Con gamma = 0.5 girare in tondo
+# vale -1 / (1 - gamma) = -2, quasi quanto arrivare al GOAL in 13+ passi, e i
+# metodi on-policy non distinguono un ciclo dal percorso; con alpha >= 0.3 il
+# target campionato di SARSA non converge su tutti i seed in 500 episodi
+alpha = 0.1
+gamma = 1.0
 
 EPISODES = 500
 EPSILON_START = 1
 EPSILON_DECAY = EPSILON_START / (EPISODES / 2)
-
-def choose_action(env, QTable, state, epsilon):
-    pass
-
-def qLearning(QTable, env):
-    epsilon = EPSILON_START
-    
-    for episode in range(EPISODES):
-        state, info = env.reset()
-        
-        while True:
-            # TODO: da modificare
-            if random() < epsilon:
-                action = env.action_space.sample()
-            else:
-                action = np.argmax(QTable[state]) 
-            
-            next_state, reward, terminated, truncated, info = env.step(action)
-
-            old_val = QTable[state, action]
-            next_max = np.max(QTable[next_state])
-
-            new_val = old_val + alpha * (reward + gamma * next_max - old_val)
-            QTable[state, action] = new_val
-
-            state = next_state
-            
-            if terminated or truncated:
-                break
-        
-        if epsilon > 0:
-            epsilon -= EPSILON_DECAY
-            epsilon = max(0, epsilon) 
-
-    return QTable
+# Metodi on-policy: con epsilon = 0 SARSA ed Expected SARSA smettono di
+# esplorare e la policy greedy puo' restare in un ciclo fino a MAX_STEPS.
+# Con un minimo di esplorazione imparano il percorso sicuro lontano dal
+# precipizio, che e' il risultato da confrontare con Q-learning
+EPSILON_MIN = 0.1
+SEED = 0
+
+NUM_RUNS = 200 # addestramenti paralleli nel confronto tra algoritmi
+# CliffWalking non ha limite di passi: con epsilon = 0 una policy greedy non
+# ancora convergente puo' girare in tondo per sempre, quindi tronchiamo
+MAX_STEPS = 1000
+
+def sarsa(QTable, env):
+    # On-policy: il target usa Q(s', a') con a' scelta epsilon-greedy ed eseguita davvero
+    return tdControl(QTable, env, "sarsa", EPISODES, alpha, gamma,
+                     EPSILON_START, EPSILON_DECAY, seed=SEED, epsilon_min=EPSILON_MIN)
+
+def expectedSarsa(QTable, env):
+    # Il target usa il valore atteso di Q(s', .) sotto la policy epsilon-greedy
+    return tdControl(QTable, env, "expected_sarsa", EPISODES, alpha, gamma,
+                     EPSILON_START, EPSILON_DECAY, seed=SEED, epsilon_min=EPSILON_MIN)
+
+def compare(env):
+    """
+    Q-learning, SARSA ed Expected SARSA a confronto: NUM_RUNS addestramenti
+    indipendenti per algoritmo, con gli stessi seed e lo stesso EPSILON_MIN.
+    """
+    print(f"Confronto su {NUM_RUNS} run per algoritmo ({EPISODES} episodi ciascuno)")
+    print(f"{'algoritmo':<16} {'reward medio (primi 100)':>25} {'reward medio (ultimi 100)':>26} {'tempo (s)':>10}")
+    for method in METHODS:
+        start = time.perf_counter()
+        Q, returns = tdControlBatched(env, method, NUM_RUNS, EPISODES, alpha, gamma,
+                                      EPSILON_START, EPSILON_DECAY, seed=SEED, epsilon_min=EPSILON_MIN)
+        elapsed = time.perf_counter() - start
+        print(f"{method:<16} {returns[:, :100].mean():>25.1f} {returns[:, -100:].mean():>26.1f} {elapsed:>10.2f}")
 
 def main():
-    # Carichiamo l'ambiente. 
+    # Carichiamo l'ambiente come simulatore tabellare (stessa dinamica di gymnasium,
+    # senza lo stack di wrapper ad ogni passo).
     # Nota: Se 'CliffWalking-v1' da errore, usa 'CliffWalking-v0' (lo standard attuale)
     try:
-        env = gym.make('CliffWalking-v1') 
+        env = TabularEnv('CliffWalking-v1', max_episode_steps=MAX_STEPS)
     except:
         print("Versione v1 non trovata, utilizzo CliffWalking-v0")
-        env = gym.make('CliffWalking-v0')
+        env = TabularEnv('CliffWalking-v0', max_episode_steps=MAX_STEPS)
 
     # Dimensioni dinamiche dall'ambiente
     state_space = env.observation_space.n # 48 stati
@@ -66,8 +78,15 @@ def main():
     
     QTable = np.zeros((state_space, action_space))
 
+    if len(sys.argv) > 1 and sys.argv[1] == "compare":
+        compare(env)
+        return
+
     print("Training in corso...")
-    Q = qLearning(QTable, env)
+    if len(sys.argv) > 1 and sys.argv[1] == "expected":
+        Q = expectedSarsa(QTable, env)
+    else:
+        Q = sarsa(QTable, env)
     print("Training completato.\n")
 
     print("Output Legend:")
@@ -0,0 +1,133 @@
+import numpy as np
+
+from exploration import ExplorationNoise, split_seed
+
+# Metodi supportati dal ciclo comune
+METHODS = ("qlearning", "sarsa", "expected_sarsa")
+
+def choose_action(QTable, state, epsilon, noise):
+    if noise.uniform() < epsilon:
+        return noise.action()
+    return np.argmax(QTable[state])
+
+def epsilon_greedy_probs(q_rows, epsilon):
+    """
+    Distribuzione epsilon-greedy su una riga (A,) o su un batch di righe (N, A).
+    epsilon puo' essere uno scalare o un array (N,).
+    """
+    num_actions = q_rows.shape[-1]
+    epsilon = np.asarray(epsilon, dtype=float)[..., None]
+    probs = np.broadcast_to(epsilon / num_actions, q_rows.shape).copy()
+    greedy = np.argmax(q_rows, axis=-1)[..., None]
+    np.put_along_axis(probs, greedy, (1 - epsilon + epsilon / num_actions), axis=-1)
+    return probs
+
+def expected_value(q_rows, epsilon):
+    """Valore atteso di Q(s', .) sotto la policy epsilon-greedy (Expected SARSA)"""
+    return np.sum(epsilon_greedy_probs(q_rows, epsilon) * q_rows, axis=-1)
+
+def tdControl(QTable, env, method, episodes, alpha, gamma, epsilon_start, epsilon_decay, seed=0, epsilon_min=0):
+    """
+    Ciclo unico per Q-learning, SARSA ed Expected SARSA: cambia solo il valore
+    del prossimo stato usato nel target.
+      qlearning       max_a Q(s', a)
+      sarsa           Q(s', a') con a' l'azione che verra' davvero eseguita
+      expected_sarsa  sum_a pi(a|s') Q(s', a) con pi epsilon-greedy
+    epsilon decade linearmente di epsilon_decay a episodio fino a epsilon_min.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Metodo sconosciuto: {method}")
+
+    # Stream indipendenti per l'ambiente e per l'esplorazione
+    env_seed, noise_seed = split_seed(seed)
+    noise = ExplorationNoise(env.action_space.n, seed=noise_seed)
+    epsilon = epsilon_start
+
+    for episode in range(episodes):
+        state, info = env.reset(seed=env_seed if episode == 0 else None)
+        action = choose_action(QTable, state, epsilon, noise)
+
+        while True:
+            next_state, reward, terminated, truncated, info = env.step(action)
+
+            if method == "sarsa":
+                next_action = choose_action(QTable, next_state, epsilon, noise)
+                next_value = QTable[next_state, next_action]
+            elif method == "expected_sarsa":
+                next_value = expected_value(QTable[next_state], epsilon)
+            else:
+                next_value = np.max(QTable[next_state])
+
+            old_val = QTable[state, action]
+            QTable[state, action] = old_val + alpha * (reward + gamma * next_value - old_val)
+
+            if terminated or truncated:
+                break
+
+            # Per i metodi off-policy / attesi l'azione si sceglie dopo l'aggiornamento
+            if method != "sarsa":
+                next_action = choose_action(QTable, next_state, epsilon, noise)
+            state, action = next_state, next_action
+
+        epsilon = max(epsilon_min, epsilon - epsilon_decay)
+
+    return QTable
+
+def tdControlBatched(env, method, num_runs, episodes, alpha, gamma, epsilon_start, epsilon_decay, seed=0, epsilon_min=0):
+    """
+    num_runs addestramenti indipendenti (una Q-Table per run) portati avanti
+    insieme su un TabularEnv in modalita' batch. Restituisce le Q-Table
+    (num_runs, S, A) e il reward totale di ogni episodio (num_runs, episodes).
+    Ogni run aggiorna solo la propria tabella, quindi lo scatter non ha conflitti.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Metodo sconosciuto: {method}")
+
+    env_seed, noise_seed = split_seed(seed)
+    rng = np.random.default_rng(noise_seed)
+    num_states, num_actions = env.observation_space.n, env.action_space.n
+    Q = np.zeros((num_runs, num_states, num_actions))
+    runs = np.arange(num_runs)
+
+    returns = np.zeros((num_runs, episodes))
+    episode = np.zeros(num_runs, dtype=np.int64)
+    epsilon = np.full(num_runs, float(epsilon_start))
+
+    def choose(states):
+        greedy = np.argmax(Q[runs, states], axis=1)
+        explore = rng.random(num_runs) < epsilon
+        return np.where(explore, rng.integers(0, num_actions, size=num_runs), greedy)
+
+    states = env.reset_batch(num_runs, seed=env_seed)
+    actions = choose(states)
+
+    while np.any(episode < episodes):
+        active = episode < episodes
+        next_states, rewards, terminated, truncated = env.step_batch(actions)
+
+        if method == "sarsa":
+            next_actions = choose(next_states)
+            next_values = Q[runs, next_states, next_actions]
+        elif method == "expected_sarsa":
+            next_values = expected_value(Q[runs, next_states], epsilon)
+        else:
+            next_values = Q[runs, next_states].max(axis=1)
+
+        done = terminated | truncated
+        old_vals = Q[runs, states, actions]
+        new_vals = old_vals + alpha * (rewards + gamma * next_values - old_vals)
+        Q[runs, states, actions] = np.where(active, new_vals, old_vals)
+
+        returns[runs[active], episode[active]] += rewards[active]
+        episode += done & active
+        epsilon = np.where(done, np.maximum(epsilon_min, epsilon - epsilon_decay), epsilon)
+
+        # I run con episodio finito ripartono dallo stato iniziale gia' scelto dall'ambiente
+        states = env.states
+        if method == "sarsa":
+            restart = choose(states)
+            actions = np.where(done, restart, next_actions)
+        else:
+            actions = choose(states)
+
+    return Q, returns
@@ -0,0 +1,244 @@
+import numpy as np
+
+# Direzioni delle linee: orizzontale, verticale, diagonale, antidiagonale
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+class MNKBoard:
+    """
+    Regole di un m,n,k-game (griglia rows x cols, vince chi allinea k segni)
+    su griglie codificate come interi in base 3, come in tictactoe_board.py:
+    cifra 0 casella vuota, 1 giocatore 1 (X), 2 giocatore -1 (O).
+
+    Tutte le funzioni lavorano su array di codici: le vittorie si controllano
+    con maschere di bit precalcolate per ogni linea di k caselle, senza
+    tabelle grandi 3^(rows*cols) (per il 4x4 sarebbero 43 milioni di voci).
+    """
+
+    def __init__(self, rows=3, cols=3, k=3):
+        self.rows, self.cols, self.k = rows, cols, k
+        self.size = rows * cols
+        self.pow3 = 3 ** np.arange(self.size, dtype=np.int64)
+
+        lines = []
+        for r in range(rows):
+            for c in range(cols):
+                for dr, dc in DIRECTIONS:
+                    end_r, end_c = r + (k - 1) * dr, c + (k - 1) * dc
+                    if 0 <= end_r < rows and 0 <= end_c < cols:
+                        lines.append([(r + i * dr) * cols + (c + i * dc) for i in range(k)])
+        self.lines = np.array(lines)
+        self.line_masks = np.array([sum(1 << cell for cell in line) for line in lines], dtype=np.int64)
+        # Per ogni casella le linee che la contengono: dopo una mossa basta controllare quelle
+        self.cell_lines = [[int(mask) for mask, line in zip(self.line_masks, lines) if cell in line]
+                           for cell in range(self.size)]
+        self.symmetries = self._build_symmetries()
+
+    def _build_symmetries(self):
+        # Griglia quadrata: le 8 simmetrie del quadrato; altrimenti le 4 del rettangolo
+        cells = np.arange(self.size).reshape(self.rows, self.cols)
+        if self.rows == self.cols:
+            grids = [np.rot90(grid, k) for grid in (cells, cells.T) for k in range(4)]
+        else:
+            grids = [cells, cells[::-1], cells[:, ::-1], cells[::-1, ::-1]]
+        return np.array([grid.ravel() for grid in grids])
+
+    ## ------------------------------------------------------------------
+    ## CODIFICA
+    ## ------------------------------------------------------------------
+
+    def encode(self, board):
+        board = np.asarray(board).ravel()
+        return int(np.sum(np.where(board == -1, 2, board).astype(np.int64) * self.pow3))
+
+    def decode(self, code):
+        digits = self.digits(np.array([code]))[0]
+        return np.where(digits == 2, -1, digits).astype(np.int8)
+
+    def digits(self, codes):
+        """Cifre in base 3 di ogni codice: matrice (N, size) int8"""
+        codes = np.asarray(codes, dtype=np.int64)
+        out = np.empty((len(codes), self.size), dtype=np.int8)
+        for cell in range(self.size):
+            out[:, cell] = (codes // self.pow3[cell]) % 3
+        return out
+
+    def masks(self, codes):
+        """Maschere di bit delle caselle di X e di O per ogni codice"""
+        digits = self.digits(codes)
+        x_mask = np.zeros(len(digits), dtype=np.int64)
+        o_mask = np.zeros(len(digits), dtype=np.int64)
+        for cell in range(self.size):
+            x_mask |= (digits[:, cell] == 1).astype(np.int64) << cell
+            o_mask |= (digits[:, cell] == 2).astype(np.int64) << cell
+        return x_mask, o_mask, digits
+
+    ## ------------------------------------------------------------------
+    ## REGOLE (vettoriali)
+    ## ------------------------------------------------------------------
+
+    def winner(self, codes):
+        """1 se X ha una linea di k segni, -1 se ce l'ha O, 0 altrimenti"""
+        x_mask, o_mask, _ = self.masks(codes)
+        return self._winner(x_mask, o_mask)
+
+    def _winner(self, x_mask, o_mask):
+        x_wins = np.zeros(len(x_mask), dtype=bool)
+        o_wins = np.zeros(len(o_mask), dtype=bool)
+        for line in self.line_masks:
+            x_wins |= (x_mask & line) == line
+            o_wins |= (o_mask & line) == line
+        return np.where(x_wins, 1, np.where(o_wins, -1, 0)).astype(np.int8)
+
+    def completes_line(self, mask, cell):
+        """True se la maschera di un giocatore (int) ha una linea passante per cell"""
+        return any(mask & line == line for line in self.cell_lines[cell])
+
+    def num_empty(self, codes):
+        return np.count_nonzero(self.digits(codes) == 0, axis=1)
+
+    def canonical(self, codes, return_transform=False):
+        """
+        Codice minimo tra tutte le trasformate simmetriche di ogni griglia.
+        Con return_transform anche l'indice t della simmetria usata: la
+        casella c della griglia canonica e' la casella symmetries[t][c]
+        della griglia originale.
+        """
+        digits = self.digits(codes).astype(np.int64)
+        transformed = np.array([digits[:, perm] @ self.pow3 for perm in self.symmetries])
+        transform = np.argmin(transformed, axis=0)
+        canonical = transformed[transform, np.arange(len(digits))]
+        if return_transform:
+            return canonical, transform
+        return canonical
+
+    ## ------------------------------------------------------------------
+    ## ENUMERAZIONE DEGLI STATI
+    ## ------------------------------------------------------------------
+
+    def enumerate_states(self, canonical=None, with_edges=True):
+        """
+        Tutte le griglie raggiungibili da quella vuota (X muove per primo),
+        livello per livello (BFS sul numero di mosse) senza ricorsione.
+        Ogni livello e' un array ordinato di codici unici; i figli di un
+        livello si generano con una maschera per casella libera.
+
+        canonical: funzione vettoriale codici -> codici (es. self.canonical)
+        per enumerare solo i rappresentanti delle classi di simmetria.
+        with_edges=False salta l'indice padre/figlio (solo stati e livelli).
+        """
+        frontier = np.zeros(1, dtype=np.int64)
+        levels = []
+        edges = []
+        base = 0
+
+        for move in range(self.size + 1):
+            x_mask, o_mask, digits = self.masks(frontier)
+            winner = self._winner(x_mask, o_mask)
+            terminal = (winner != 0) | (move == self.size)
+            levels.append((frontier, winner, terminal))
+
+            open_ids = np.flatnonzero(~terminal).astype(np.int32)
+            if len(open_ids) == 0:
+                break
+
+            # Espansione: per ogni casella, i genitori non terminali in cui e' libera
+            digit = 1 if move % 2 == 0 else 2
+            parents, children, actions = [], [], []
+            for cell in range(self.size):
+                ids = open_ids[digits[open_ids, cell] == 0]
+                parents.append(ids)
+                children.append(frontier[ids] + digit * self.pow3[cell])
+                actions.append(np.full(len(ids), cell, dtype=np.int8))
+            children = np.concatenate(children)
+            if canonical is not None:
+                children = canonical(children)
+
+            next_frontier, child_index = np.unique(children, return_inverse=True)
+            if with_edges:
+                # Archi del livello in indici locali, ordinati per genitore e per figlio:
+                # i livelli sono consecutivi, quindi concatenandoli l'ordine resta globale
+                edges.append(_level_edges(np.concatenate(parents), child_index.astype(np.int32),
+                                          np.concatenate(actions), base, len(frontier), len(next_frontier)))
+            base += len(frontier)
+            frontier = next_frontier
+
+        return StateGraph(levels, edges if with_edges else None)
+
+def _level_edges(parent, child, action, base, num_parents, num_children):
+    by_parent = np.argsort(parent, kind="stable")
+    by_child = np.argsort(child, kind="stable")
+    next_base = base + num_parents
+    return (
+        (next_base + child[by_parent]).astype(np.int32), action[by_parent],
+        np.bincount(parent, minlength=num_parents),
+        (base + parent[by_child]).astype(np.int32), action[by_child],
+        np.bincount(child, minlength=num_children),
+    )
+
+class StateGraph:
+    """
+    Grafo degli stati prodotto da MNKBoard.enumerate_states.
+
+    Gli id 0..N-1 seguono i livelli (numero di mosse giocate), quindi sono
+    gia' in ordine topologico: ogni arco va da un livello al successivo.
+      codes[id], winner[id], terminal[id]
+      level_ptr[m]:level_ptr[m+1]          id degli stati con m mosse giocate
+      child_ptr[id]:child_ptr[id+1]        archi uscenti: children, child_action
+      parent_ptr[id]:parent_ptr[id+1]      archi entranti: parents, parent_action
+    """
+
+    def __init__(self, levels, edges=None):
+        self.codes = np.concatenate([codes for codes, _, _ in levels])
+        self.winner = np.concatenate([winner for _, winner, _ in levels])
+        self.terminal = np.concatenate([terminal for _, _, terminal in levels])
+        self.level_ptr = np.cumsum([0] + [len(codes) for codes, _, _ in levels])
+        self.num_states = len(self.codes)
+
+        if edges is None:
+            return
+        children, child_action, out_degree, parents, parent_action, in_degree = zip(*edges)
+        self.children = np.concatenate(children)
+        self.child_action = np.concatenate(child_action)
+        self.parents = np.concatenate(parents)
+        self.parent_action = np.concatenate(parent_action)
+
+        # Stati dell'ultimo livello: nessun figlio; stato iniziale: nessun genitore
+        out_degree = np.concatenate(out_degree + (np.zeros(self.num_states - sum(map(len, out_degree)), dtype=np.int64),))
+        in_degree = np.concatenate((np.zeros(1, dtype=np.int64),) + in_degree)
+        self.child_ptr = np.concatenate([[0], np.cumsum(out_degree)])
+        self.parent_ptr = np.concatenate([[0], np.cumsum(in_degree)])
+
+    @property
+    def num_edges(self):
+        return len(self.children)
+
+    def index(self, codes):
+        """Id degli stati con questi codici (ogni livello e' ordinato per codice)"""
+        codes = np.asarray(codes, dtype=np.int64)
+        ids = np.empty(len(codes), dtype=np.int64)
+        # Il livello di un codice e' il numero di caselle piene, ma per non
+        # decodificare basta cercarlo in ogni livello: sono al piu' size + 1
+        found = np.zeros(len(codes), dtype=bool)
+        for m in range(len(self.level_ptr) - 1):
+            level = self.codes[self.level_ptr[m]:self.level_ptr[m + 1]]
+            pos = np.searchsorted(level, codes)
+            hit = ~found & (pos < len(level))
+            hit[hit] = level[pos[hit]] == codes[hit]
+            ids[hit] = self.level_ptr[m] + pos[hit]
+            found |= hit
+        if not found.all():
+            raise KeyError("codici non presenti nel grafo")
+        return ids
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    # "python mnk_board.py 4 4 3": numero di stati e archi e tempo di enumerazione
+    rows, cols, k = (int(x) for x in sys.argv[1:4]) if len(sys.argv) > 3 else (3, 3, 3)
+    rules = MNKBoard(rows, cols, k)
+    for name, canonical in (("completo", None), ("simmetrie", rules.canonical)):
+        start = time.perf_counter()
+        graph = rules.enumerate_states(canonical=canonical)
+        elapsed = time.perf_counter() - start
+        print(f"{rows}x{cols} k={k} {name:<10} stati: {graph.num_states:>10}  archi: {graph.num_edges:>10}  tempo: {elapsed:.2f} s")
@@ -0,0 +1,191 @@
+import numpy as np
+import gymnasium as gym
+from gymnasium import spaces
+
+class TabularEnv:
+    """
+    Sostituto degli ambienti toy-text di gymnasium (CliffWalking, Taxi, ...).
+
+    La tabella delle transizioni P dell'ambiente viene letta una volta e
+    salvata in array densi (S, A, K), con K il numero massimo di esiti di una
+    coppia stato-azione: probabilita' cumulate, stato successivo, reward e
+    flag di terminazione. step() diventa un paio di letture in tabella invece
+    di un giro nello stack di wrapper (order enforcing, passive checker,
+    time limit).
+
+    reset()/step() estraggono gli esiti esattamente come gymnasium (un
+    uniforme per chiamata da un Generator con lo stesso seed), quindi con lo
+    stesso seed e le stesse azioni restituiscono la stessa traiettoria. Si
+    simula solo la dinamica di P: opzioni come fickle_passenger di Taxi non
+    sono supportate, e info contiene solo "prob" (niente "action_mask", che
+    Taxi di gymnasium aggiunge a ogni passo).
+    """
+
+    def __init__(self, env_id, max_episode_steps=None, **kwargs):
+        env = gym.make(env_id, **kwargs)
+        base = env.unwrapped
+        if max_episode_steps is None:
+            max_episode_steps = env.spec.max_episode_steps
+        self.max_episode_steps = max_episode_steps
+
+        num_states = base.observation_space.n
+        num_actions = base.action_space.n
+        num_outcomes = max(len(base.P[s][a]) for s in range(num_states) for a in range(num_actions))
+
+        # Gli esiti oltre quelli reali hanno probabilita' 0 (mai estratti)
+        probs = np.zeros((num_states, num_actions, num_outcomes))
+        self.next_state = np.zeros((num_states, num_actions, num_outcomes), dtype=np.int64)
+        self.reward = np.zeros((num_states, num_actions, num_outcomes))
+        self.terminated = np.zeros((num_states, num_actions, num_outcomes), dtype=bool)
+        for s in range(num_states):
+            for a in range(num_actions):
+                for k, (p, s_next, r, t) in enumerate(base.P[s][a]):
+                    probs[s, a, k] = p
+                    self.next_state[s, a, k] = s_next
+                    self.reward[s, a, k] = r
+                    self.terminated[s, a, k] = t
+        self.probs = probs
+        self.cum_probs = np.cumsum(probs, axis=2)
+        self.initial_cdf = np.cumsum(base.initial_state_distrib)
+        # Stati da cui puo' partire un episodio (es. Taxi: 300 dei 500)
+        self.initial_states = np.flatnonzero(base.initial_state_distrib)
+        env.close()
+
+        # Copie in liste per step() (vedi exploration.ExplorationNoise)
+        self._cum_probs = self.cum_probs.tolist()
+        self._probs = probs.tolist()
+        self._next_state = self.next_state.tolist()
+        self._reward = self.reward.tolist()
+        self._terminated = self.terminated.tolist()
+
+        self.observation_space = spaces.Discrete(num_states)
+        self.action_space = spaces.Discrete(num_actions)
+        self.np_random = None
+        self.s = None
+        self.elapsed_steps = 0
+
+    ## ------------------------------------------------------------------
+    ## AMBIENTE SINGOLO (stessa API di gymnasium)
+    ## ------------------------------------------------------------------
+
+    def reset(self, seed=None, options=None):
+        if seed is not None or self.np_random is None:
+            self.np_random = np.random.default_rng(seed)
+        self.s = int(np.argmax(self.initial_cdf > self.np_random.random()))
+        self.elapsed_steps = 0
+        return self.s, {"prob": 1.0}
+
+    def step(self, action):
+        # Un'estrazione per passo anche con transizioni deterministiche, come gymnasium
+        u = self.np_random.random()
+        s = self.s
+        k = 0
+        for i, c in enumerate(self._cum_probs[s][action]):
+            if c > u:
+                k = i
+                break
+
+        p = self._probs[s][action][k]
+        reward = self._reward[s][action][k]
+        terminated = self._terminated[s][action][k]
+        self.s = self._next_state[s][action][k]
+
+        self.elapsed_steps += 1
+        truncated = self.max_episode_steps is not None and self.elapsed_steps >= self.max_episode_steps
+        return self.s, reward, terminated, truncated, {"prob": p}
+
+    def close(self):
+        pass
+
+    ## ------------------------------------------------------------------
+    ## BATCH DI AMBIENTI
+    ## ------------------------------------------------------------------
+
+    def reset_batch(self, num_envs, seed=None):
+        """Avvia num_envs episodi indipendenti; gli stati correnti sono in self.states"""
+        self.batch_rng = np.random.default_rng(seed)
+        self.states = self._sample_initial(num_envs)
+        self.batch_elapsed = np.zeros(num_envs, dtype=np.int64)
+        return self.states
+
+    def step_batch(self, actions):
+        """
+        Avanza ogni episodio di un passo. Restituisce (next_states, rewards,
+        terminated, truncated) della transizione appena eseguita; gli
+        episodi finiti vengono resettati automaticamente, quindi self.states
+        contiene gia' lo stato da cui ogni ambiente agisce al passo dopo.
+        """
+        states = self.states
+        num_envs = len(states)
+
+        if self.probs.shape[2] == 1:
+            k = np.zeros(num_envs, dtype=np.int64)
+        else:
+            u = self.batch_rng.random(num_envs)
+            k = (self.cum_probs[states, actions] <= u[:, None]).sum(axis=1)
+            k = np.minimum(k, self.probs.shape[2] - 1)
+
+        next_states = self.next_state[states, actions, k]
+        rewards = self.reward[states, actions, k]
+        terminated = self.terminated[states, actions, k]
+
+        self.batch_elapsed += 1
+        if self.max_episode_steps is None:
+            truncated = np.zeros(num_envs, dtype=bool)
+        else:
+            truncated = self.batch_elapsed >= self.max_episode_steps
+
+        done = terminated | truncated
+        self.states = next_states.copy()
+        if done.any():
+            self.states[done] = self._sample_initial(int(done.sum()))
+            self.batch_elapsed[done] = 0
+        return next_states, rewards, terminated, truncated
+
+    def rollout(self, policy, states=None, max_steps=None, seed=None):
+        """
+        Gioca una policy deterministica (array stato -> azione, es. l'argmax
+        di una Q-Table) da tutti gli stati di partenza insieme, senza reset,
+        finche' l'episodio termina o si arriva a max_steps (di default il
+        limite di passi dell'ambiente). Di default states sono tutti gli
+        stati iniziali validi.
+        Restituisce (returns, steps, terminated) per stato di partenza:
+        ritorno non scontato, passi eseguiti e se l'episodio e' terminato
+        prima del limite (False: troncato).
+        """
+        if max_steps is None:
+            max_steps = self.max_episode_steps
+        if max_steps is None:
+            raise ValueError("rollout richiede un limite di passi (max_steps o max_episode_steps)")
+        rng = np.random.default_rng(seed)
+        policy = np.asarray(policy)
+        states = np.array(self.initial_states if states is None else states, dtype=np.int64)
+
+        num_envs = len(states)
+        returns = np.zeros(num_envs)
+        steps = np.zeros(num_envs, dtype=np.int64)
+        terminated = np.zeros(num_envs, dtype=bool)
+        active = np.arange(num_envs)
+
+        for _ in range(max_steps):
+            s = states[active]
+            a = policy[s]
+            if self.probs.shape[2] == 1:
+                k = np.zeros(len(active), dtype=np.int64)
+            else:
+                u = rng.random(len(active))
+                k = np.minimum((self.cum_probs[s, a] <= u[:, None]).sum(axis=1), self.probs.shape[2] - 1)
+
+            returns[active] += self.reward[s, a, k]
+            steps[active] += 1
+            states[active] = self.next_state[s, a, k]
+            done = self.terminated[s, a, k]
+            terminated[active[done]] = True
+            active = active[~done]
+            if len(active) == 0:
+                break
+        return returns, steps, terminated
+
+    def _sample_initial(self, n):
+        u = self.batch_rng.random(n)
+        return np.minimum(np.searchsorted(self.initial_cdf, u, side="right"), len(self.initial_cdf) - 1)
@@ -1,21 +1,9 @@
+import sys
 import gymnasium as gym
 import numpy as np
-import random
 import time # Lo useremo per monitorare i progressi
-
-print("--- Avvio Progetto 1: Il Tassista (Addestramento) ---")
-
-# 1. Creare l'ambiente
-# Nota: l'addestramento è MOLTO più veloce senza rendering
-env = gym.make("Taxi-v3") 
-
-# 2. Ispezionare gli spazi
-num_stati = env.observation_space.n
-num_azioni = env.action_space.n
-
-# 3. Inizializzare la Q-Table
-q_table = np.zeros((num_stati, num_azioni))
-print(f"Q-Table (cervello) creata con dimensioni: {q_table.shape}")
+from exploration import ExplorationNoise, split_seed
+from tabular_envs import TabularEnv
 
 # 4. Definire gli Iperparametri
 num_episodi = 10000  # Partite totali da giocare per imparare
@@ -28,118 +16,229 @@ min_epsilon = 0.01      # Tasso di esplorazione MINIMO (1% casuale)
 # Calcoliamo il valore di "decadimento" lineare
 # Vogliamo che epsilon passi da 1.0 a 0.01 in 10.000 passi
 epsilon_decay_value = (max_epsilon - min_epsilon) / num_episodi
-epsilon = max_epsilon   # Epsilon corrente parte dal massimo
-
-print(f"Iperparametri impostati per {num_episodi} episodi.")
-
-# 5. --- IL CICLO DI ADDESTRAMENTO ---
-print("\n--- Inizio Addestramento ---")
-start_time = time.time() # Memorizziamo l'ora di inizio
-
-for episodio in range(num_episodi):
-    
-    # 5.1 Resettare l'ambiente per un nuovo episodio
-    (stato, info) = env.reset()
-    
-    terminato = False
-    troncato = False
-    
-    # 5.2 Ciclo interno (una singola partita, passo dopo passo)
-    while not (terminato or troncato):
-        
-        # 5.3 Scelta dell'Azione (Epsilon-Greedy)
-        # Generiamo un numero casuale tra 0 e 1
-        random_tradeoff = random.uniform(0, 1)
-        
-        if random_tradeoff > epsilon:
-            # === EXPLOITATION (SFRUTTAMENTO) ===
-            # Scegliamo l'azione migliore (con il Q-value più alto) 
-            # per lo stato attuale dalla Q-Table
-            azione = np.argmax(q_table[stato, :])
-        else:
-            # === EXPLORATION (ESPLORAZIONE) ===
-            # Scegliamo un'azione casuale
-            azione = env.action_space.sample()
-
-        # 5.4 Eseguire l'azione e osservare il risultato dall'ambiente
-        (nuovo_stato, ricompensa, terminato, troncato, info) = env.step(azione)
-        
-        # 5.5 Aggiornamento della Q-Table (La formula di Bellman!)
-        
-        # Troviamo il Q-value massimo per il *nuovo_stato* (il termine: max_a' Q(s', a'))
-        max_q_futuro = np.max(q_table[nuovo_stato, :])
-        
-        # Il nostro Q-value attuale (vecchio)
-        q_vecchio = q_table[stato, azione]
-        
-        # LA FORMULA COMPLETA:
-        # Q_nuovo = Q_vecchio + alpha * (Ricompensa + gamma * max_Q_futuro - Q_vecchio)
-        q_nuovo = q_vecchio + learning_rate * (ricompensa + discount_factor * max_q_futuro - q_vecchio)
-        
-        # Aggiorniamo la tabella con il nuovo valore calcolato
-        q_table[stato, azione] = q_nuovo
-        
-        # 5.6 Aggiornare lo stato per il prossimo ciclo
-        stato = nuovo_stato
-    
-    # 5.7 Fine Episodio: Decadimento di Epsilon
-    # Riduciamo epsilon, ma ci assicuriamo che non scenda mai sotto il minimo
-    epsilon = max(min_epsilon, epsilon - epsilon_decay_value)
-
-    # Log di progresso (ogni 1000 episodi)
-    if (episodio + 1) % 1000 == 0:
-        print(f"Episodio {episodio + 1} / {num_episodi} completato. Epsilon attuale: {epsilon:.4f}")
-
-# 6. Fine addestramento
-env.close()
-end_time = time.time()
-
-print("\n--- Addestramento Terminato ---")
-print(f"Tempo totale di addestramento: {end_time - start_time:.2f} secondi")
-
-# Diamo un'occhiata al nostro "cervello" addestrato
-print("\nEsempio di valori dalla Q-Table (prime 5 righe):")
-print(q_table[:5])
+
+# Un solo seed rende riproducibile l'addestramento
+seed = 0
+num_ambienti = 256 # Taxi in parallelo nella modalità vettoriale
+
+def addestra(env, q_table, num_episodi, epsilon, rumore, seed_ambiente):
+    """
+    Q-learning su una partita alla volta, epsilon-greedy con il rumore
+    pre-estratto di rumore (ExplorationNoise). seed_ambiente fissa gli stati
+    iniziali: deve essere indipendente dal seed di rumore (vedi split_seed).
+    """
+    for episodio in range(num_episodi):
+
+        # 5.1 Resettare l'ambiente per un nuovo episodio
+        (stato, info) = env.reset(seed=seed_ambiente if episodio == 0 else None)
+
+        terminato = False
+        troncato = False
+
+        # 5.2 Ciclo interno (una singola partita, passo dopo passo)
+        while not (terminato or troncato):
+
+            # 5.3 Scelta dell'Azione (Epsilon-Greedy)
+            # Generiamo un numero casuale tra 0 e 1
+            random_tradeoff = rumore.uniform()
+
+            if random_tradeoff > epsilon:
+                # === EXPLOITATION (SFRUTTAMENTO) ===
+                # Scegliamo l'azione migliore (con il Q-value più alto)
+                # per lo stato attuale dalla Q-Table
+                azione = np.argmax(q_table[stato, :])
+            else:
+                # === EXPLORATION (ESPLORAZIONE) ===
+                # Scegliamo un'azione casuale
+                azione = rumore.action()
+
+            # 5.4 Eseguire l'azione e osservare il risultato dall'ambiente
+            (nuovo_stato, ricompensa, terminato, troncato, info) = env.step(azione)
+
+            # 5.5 Aggiornamento della Q-Table (La formula di Bellman!)
+
+            # Troviamo il Q-value massimo per il *nuovo_stato* (il termine: max_a' Q(s', a'))
+            max_q_futuro = np.max(q_table[nuovo_stato, :])
+
+            # Il nostro Q-value attuale (vecchio)
+            q_vecchio = q_table[stato, azione]
+
+            # LA FORMULA COMPLETA:
+            # Q_nuovo = Q_vecchio + alpha * (Ricompensa + gamma * max_Q_futuro - Q_vecchio)
+            q_nuovo = q_vecchio + learning_rate * (ricompensa + discount_factor * max_q_futuro - q_vecchio)
+
+            # Aggiorniamo la tabella con il nuovo valore calcolato
+            q_table[stato, azione] = q_nuovo
+
+            # 5.6 Aggiornare lo stato per il prossimo ciclo
+            stato = nuovo_stato
+
+        # 5.7 Fine Episodio: Decadimento di Epsilon
+        # Riduciamo epsilon, ma ci assicuriamo che non scenda mai sotto il minimo
+        epsilon = max(min_epsilon, epsilon - epsilon_decay_value)
+
+        # Log di progresso (ogni 1000 episodi)
+        if (episodio + 1) % 1000 == 0:
+            print(f"Episodio {episodio + 1} / {num_episodi} completato. Epsilon attuale: {epsilon:.4f}")
+
+    return q_table, num_episodi
+
+def addestra_vettoriale(env, q_table, num_ambienti, num_episodi, epsilon, rng, seed_ambiente):
+    """
+    Stesso Q-learning di addestra, ma num_ambienti partite avanzano
+    insieme: azioni greedy con un solo argmax su q_table[stati], un solo
+    scatter per aggiornare la Q-Table e reset automatico delle partite finite.
+    Epsilon decade una volta per ogni episodio completato, come nel ciclo singolo.
+    """
+    num_azioni = env.action_space.n
+    q_flat = q_table.ravel()
+    stati = env.reset_batch(num_ambienti, seed=seed_ambiente)
+    episodi_completati = 0
+    prossimo_log = 1000
+
+    while episodi_completati < num_episodi:
+        # Epsilon-Greedy su tutte le partite
+        azioni = np.argmax(q_table[stati], axis=1)
+        esplora = rng.random(num_ambienti) <= epsilon
+        azioni = np.where(esplora, rng.integers(0, num_azioni, size=num_ambienti), azioni)
+
+        nuovi_stati, ricompense, terminati, troncati = env.step_batch(azioni)
+
+        # Bellman su tutte le partite; dopo una vera terminazione non c'è futuro,
+        # dopo un troncamento (limite di 200 passi) sì
+        max_q_futuro = np.where(terminati, 0.0, q_table[nuovi_stati].max(axis=1))
+        indici = stati * num_azioni + azioni
+        td = ricompense + discount_factor * max_q_futuro - q_flat[indici]
+
+        # Scatter: se più partite aggiornano la stessa (stato, azione) si usa la media
+        somma_td = np.bincount(indici, weights=td, minlength=q_flat.size)
+        conteggi = np.bincount(indici, minlength=q_flat.size)
+        q_flat += learning_rate * somma_td / np.maximum(conteggi, 1)
+
+        finiti = int(np.count_nonzero(terminati | troncati))
+        if finiti:
+            episodi_completati += finiti
+            epsilon = max(min_epsilon, epsilon - epsilon_decay_value * finiti)
+
+            if episodi_completati >= prossimo_log:
+                print(f"Episodio {episodi_completati} / {num_episodi} completato. Epsilon attuale: {epsilon:.4f}")
+                prossimo_log += 1000
+
+        # Le partite finite sono già state resettate dall'ambiente
+        stati = env.states
+
+    return q_table, episodi_completati
 
 # --- SEZIONE 7: VALUTAZIONE DELL'AGENTE ADDETRATO ---
 
-print("\n--- Inizio Valutazione ---")
-print("Avvio di 5 episodi con l'agente addestrato...")
-
-# 7.1 Creare un nuovo ambiente per la visualizzazione
-# Questa volta, attiviamo il rendering "human"
-env_visual = gym.make("Taxi-v3", render_mode="human")
-
-num_episodi_test = 5
-
-for episodio in range(num_episodi_test):
-    
-    (stato, info) = env_visual.reset()
-    
-    terminato = False
-    troncato = False
-    
-    print(f"\n--- Inizio Episodio Test {episodio + 1} ---")
-    
-    while not (terminato or troncato):
-        
-        # 7.2 Scelta dell'Azione (SOLO EXPLOITATION)
-        # Scegliamo l'azione migliore dalla nostra Q-Table addestrata
-        # Non c'è più Epsilon, l'agente è "sicuro di sé"
-        azione = np.argmax(q_table[stato, :])
-
-        # 7.3 Eseguire l'azione e osservare
-        (nuovo_stato, ricompensa, terminato, troncato, info) = env_visual.step(azione)
-        
-        # 7.4 Rallentare per permetterci di vedere
-        # La finestra si aggiornerà automaticamente dopo env.step()
-        time.sleep(0.25) # Pausa di 0.25 secondi
-        
-        # Aggiornare lo stato
-        stato = nuovo_stato
-
-    print(f"--- Fine Episodio Test {episodio + 1} ---")
-
-# 7.5 Chiudere l'ambiente di visualizzazione
-env_visual.close()
-print("\n--- Valutazione Terminata ---")
\ No newline at end of file
+def valuta_greedy(env, q_table):
+    """
+    Policy greedy della Q-Table giocata da TUTTI gli stati iniziali validi
+    di Taxi-v3 (300: passeggero non già alla destinazione) in un solo batch
+    vettoriale (vedi TabularEnv.rollout), senza finestre né pause.
+    Un episodio che arriva al limite di passi senza terminare è un taxi
+    che gira a vuoto (la policy greedy cicla).
+    """
+    stati_iniziali = env.initial_states
+    ritorni, passi, terminati = env.rollout(np.argmax(q_table, axis=1), stati_iniziali)
+    return {
+        "stati": len(stati_iniziali),
+        "successo": terminati.mean(),
+        "passi_medi": passi[terminati].mean() if terminati.any() else float("nan"),
+        "ritorno_medio": ritorni.mean(),
+        "stati_in_ciclo": stati_iniziali[~terminati],
+    }
+
+if __name__ == "__main__":
+    print("--- Avvio Progetto 1: Il Tassista (Addestramento) ---")
+
+    # 1. Creare l'ambiente
+    # Nota: l'addestramento è MOLTO più veloce senza rendering.
+    # TabularEnv legge una volta la tabella P di Taxi-v3 e simula gli stessi passi
+    # (stesso seed -> stessa traiettoria) senza lo stack di wrapper di gymnasium.
+    env = TabularEnv("Taxi-v3")
+
+    # 2. Ispezionare gli spazi
+    num_stati = env.observation_space.n
+    num_azioni = env.action_space.n
+
+    # 3. Inizializzare la Q-Table
+    q_table = np.zeros((num_stati, num_azioni))
+    print(f"Q-Table (cervello) creata con dimensioni: {q_table.shape}")
+
+    epsilon = max_epsilon   # Epsilon corrente parte dal massimo
+
+    # Rumore di esplorazione pre-estratto: il seed è diviso in due stream
+    # indipendenti per gli stati iniziali e per l'esplorazione
+    seed_ambiente, seed_rumore = split_seed(seed)
+    rumore = ExplorationNoise(num_azioni, seed=seed_rumore)
+
+    # Modalità vettoriale: "python taxi.py vector" gioca num_ambienti taxi in parallelo
+    modalita_vettoriale = len(sys.argv) > 1 and sys.argv[1] == "vector"
+    # "python taxi.py render" (anche "vector render"): dopo la valutazione mostra
+    # 5 episodi in una finestra (serve un display)
+    mostra_episodi = "render" in sys.argv[1:]
+
+    print(f"Iperparametri impostati per {num_episodi} episodi.")
+
+    # 5. --- IL CICLO DI ADDESTRAMENTO ---
+    print("\n--- Inizio Addestramento ---")
+    start_time = time.time() # Memorizziamo l'ora di inizio
+
+    if modalita_vettoriale:
+        print(f"Modalità vettoriale: {num_ambienti} taxi in parallelo")
+        q_table, episodi_giocati = addestra_vettoriale(env, q_table, num_ambienti, num_episodi, epsilon, rumore.rng, seed_ambiente)
+    else:
+        q_table, episodi_giocati = addestra(env, q_table, num_episodi, epsilon, rumore, seed_ambiente)
+
+    # 6. Fine addestramento
+    end_time = time.time()
+
+    print("\n--- Addestramento Terminato ---")
+    print(f"Tempo totale di addestramento: {end_time - start_time:.2f} secondi")
+    print(f"Velocità: {episodi_giocati / (end_time - start_time):.0f} episodi/secondo")
+
+    # Diamo un'occhiata al nostro "cervello" addestrato
+    print("\nEsempio di valori dalla Q-Table (prime 5 righe):")
+    print(q_table[:5])
+
+    print("\n--- Inizio Valutazione ---")
+    inizio_valutazione = time.time()
+    risultati = valuta_greedy(env, q_table)
+    print(f"Stati iniziali valutati: {risultati['stati']} in {time.time() - inizio_valutazione:.3f} secondi")
+    print(f"Successo: {risultati['successo']:.1%}")
+    print(f"Passi medi (episodi riusciti): {risultati['passi_medi']:.2f}")
+    print(f"Ritorno medio: {risultati['ritorno_medio']:.2f}")
+
+    stati_in_ciclo = risultati["stati_in_ciclo"]
+    print(f"Stati che ciclano fino al troncamento ({env.max_episode_steps} passi): {len(stati_in_ciclo)}")
+    # Stato di Taxi = ((riga taxi * 5 + colonna taxi) * 5 + passeggero) * 4 + destinazione
+    for stato, riga, colonna, passeggero, destinazione in zip(stati_in_ciclo, *np.unravel_index(stati_in_ciclo, (5, 5, 5, 4))):
+        print(f"  stato {stato}: taxi ({riga}, {colonna}), passeggero {passeggero}, destinazione {destinazione}")
+    env.close()
+    print("\n--- Valutazione Terminata ---")
+
+    # 7.1 Episodi dimostrativi (solo con "render"): finestra "human" e una pausa
+    # a ogni passo per seguire il taxi
+    if mostra_episodi:
+        env_visual = gym.make("Taxi-v3", render_mode="human")
+        num_episodi_test = 5
+        print(f"Avvio di {num_episodi_test} episodi con l'agente addestrato...")
+
+        for episodio in range(num_episodi_test):
+            (stato, info) = env_visual.reset()
+            terminato = False
+            troncato = False
+            print(f"\n--- Inizio Episodio Test {episodio + 1} ---")
+
+            while not (terminato or troncato):
+                # Solo exploitation: l'azione migliore dalla Q-Table addestrata
+                azione = np.argmax(q_table[stato, :])
+                (nuovo_stato, ricompensa, terminato, troncato, info) = env_visual.step(azione)
+                # La finestra si aggiorna dopo env.step(): rallentiamo per vederla
+                time.sleep(0.25)
+                stato = nuovo_stato
+
+            print(f"--- Fine Episodio Test {episodio + 1} ---")
+
+        env_visual.close()
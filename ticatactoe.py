@@ -1,7 +1,13 @@
+import sys
+import time
+import collections
 import gymnasium as gym
 import numpy as np
 import random
 from gymnasium import spaces
+import tictactoe_board as board
+import tictactoe_eval
+from mnk_board import MNKBoard
 
 ## ------------------------------------------------------------------
 ## SECTION 1: TIC TAC TOE ENVIRONMENT
@@ -13,23 +19,35 @@ class TicTacToeEnv(gym.Env):
     Vs Player 2 ('-1' o 'O')
     
     Player 2 has random moves
+
+    rows, cols and k generalize the game to an m,n,k-game
+    (k in a row wins on a rows x cols grid)
     """
-    def __init__(self):
+    def __init__(self, rows=3, cols=3, k=3):
         super(TicTacToeEnv, self).__init__()
+        self.rules = MNKBoard(rows, cols, k)
+        self.size = rows * cols
+        self.pow3 = self.rules.pow3.tolist()
         
         # Define space of actions (up to 9 moves)
-        self.action_space = spaces.Discrete(9)
+        self.action_space = spaces.Discrete(self.size)
         
         # Define space of states
-        self.observation_space = spaces.Box(low=-1, high=1, shape=(9,), dtype=np.int8)
+        self.observation_space = spaces.Box(low=-1, high=1, shape=(self.size,), dtype=np.int8)
         
         # Inizialize 
-        self.board = np.zeros(9, dtype=np.int8)
-        self.current_player = 1 
+        self.reset()
 
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
-        self.board = np.zeros(9, dtype=np.int8)
+        self.board = np.zeros(self.size, dtype=np.int8)
+        # Base-3 code of the grid and bit mask of each player, kept in sync
+        # with self.board: a win check only looks at the precomputed lines
+        # through the last move (see mnk_board.py)
+        self.code = 0
+        self.masks = {1: 0, -1: 0}
+        self.num_moves = 0
+        self.last_move = None
         self.current_player = 1
         
         return self._get_obs(), {}
@@ -44,7 +62,7 @@ class TicTacToeEnv(gym.Env):
             return self._get_obs(), -10, False, False, {} # obs, reward, terminated, truncated, info
 
         # Player 1 move
-        self.board[action] = self.current_player
+        self._play(action, self.current_player)
         
         # Check if agent won
         if self._check_win(self.current_player):
@@ -53,7 +71,7 @@ class TicTacToeEnv(gym.Env):
             return self._get_obs(), reward, terminated, False, {}
 
         # Controlla for draw
-        if np.all(self.board != 0):
+        if self.num_moves == self.size:
             reward = 0.5
             terminated = True
             return self._get_obs(), reward, terminated, False, {}
@@ -64,7 +82,7 @@ class TicTacToeEnv(gym.Env):
         
         if len(valid_moves) > 0:
             opponent_action = random.choice(valid_moves)
-            self.board[opponent_action] = self.current_player
+            self._play(opponent_action, self.current_player)
             
             # Check if player 2 won
             if self._check_win(self.current_player):
@@ -73,7 +91,7 @@ class TicTacToeEnv(gym.Env):
                 return self._get_obs(), reward, terminated, False, {}
 
             # Check again for draw
-            if np.all(self.board != 0):
+            if self.num_moves == self.size:
                 reward = 0.5
                 terminated = True
                 return self._get_obs(), reward, terminated, False, {}
@@ -90,22 +108,21 @@ class TicTacToeEnv(gym.Env):
         """
         return tuple(self.board)
 
-    def _check_win(self, player):
+    def _play(self, action, player):
         """
-        check if player x won
+        mark a cell on both the grid and its code
         """
-        board_2d = self.board.reshape((3, 3))
+        self.board[action] = player
+        self.code += board.DIGIT[player] * self.pow3[action]
+        self.masks[player] |= 1 << int(action)
+        self.num_moves += 1
+        self.last_move = action
 
-        # Check rows and columns
-        for i in range(3):
-            if np.all(board_2d[i, :] == player) or np.all(board_2d[:, i] == player):
-                return True
-        
-        # Check diagonals
-        if np.all(np.diag(board_2d) == player) or np.all(np.diag(np.fliplr(board_2d)) == player):
-            return True
-            
-        return False
+    def _check_win(self, player):
+        """
+        check if player x won (called right after player's move)
+        """
+        return self.rules.completes_line(self.masks[player], self.last_move)
 
     def get_valid_moves(self):
         """
@@ -117,7 +134,7 @@ class TicTacToeEnv(gym.Env):
         """
         print grid
         """
-        board_2d = self.board.reshape((3, 3))
+        board_2d = self.board.reshape((self.rules.rows, self.rules.cols))
         symbols = {1: 'X', -1: 'O', 0: '.'}
         
         print("\nGrid:") # Il tuo commento aggiornato
@@ -128,78 +145,108 @@ class TicTacToeEnv(gym.Env):
 ## SECTION 2: AGENT'S POLICY FUNCTIONS
 ## ------------------------------------------------------------------
 
-def get_value(state, v_table):
-    return v_table.get(state, 0.5)
+# Largest board with a dense V-table: 3^9 float32 values take 77 KB, but a
+# 4x4 would already need 164 MB and a 5x5 about 3 TiB
+DENSE_MAX_CELLS = 9
+
+def check_symmetric(env, symmetric):
+    """
+    Canonical grids come from the precomputed 3x3 tables of tictactoe_board.py:
+    reject symmetric=True on any other board before indexing them
+    """
+    if symmetric and env.size != board.SIZE:
+        raise ValueError(f"symmetric=True is only supported on the 3x3 board, not on {env.size} cells")
+
+def state_key(code, symmetric=False):
+    """
+    Index of a grid in the v_table: its base-3 code or, with symmetric=True,
+    the code of its canonical form, so the 8 rotations/reflections of a
+    grid share one entry (see tictactoe_board.py, 3x3 grids only)
+    """
+    if symmetric:
+        return board.canonical(code)
+    return code
+
+def new_v_table(env):
+    """
+    V-table with every value at 0.5: a dense float32 array with one entry per
+    base-3 code (3^9 for the 3x3) or, on boards with more than DENSE_MAX_CELLS
+    cells, a dict holding only the grids actually visited
+    """
+    if env.size > DENSE_MAX_CELLS:
+        return collections.defaultdict(lambda: 0.5)
+    return np.full(3 ** env.size, 0.5, dtype=np.float32)
 
-def choose_action(state, valid_moves, v_table, epsilon):
+def lookup(v_table, codes):
+    """Values of an array of codes, from either kind of V-table (dict lookups don't add entries)"""
+    if isinstance(v_table, np.ndarray):
+        return v_table[codes]
+    return np.array([v_table.get(code, 0.5) for code in codes.ravel().tolist()]).reshape(codes.shape)
+
+def choose_action(code, valid_moves, v_table, epsilon, pow3, symmetric=False):
+    """
+    code: base-3 code of the grid (env.code), valid_moves: array of free cells,
+    pow3: powers of 3 of the board cells (env.rules.pow3), so the afterstate
+    of the agent (digit 1) playing cell a is code + pow3[a]
+    """
     if random.random() < epsilon:
         # Random valid move
         return random.choice(valid_moves)
     else:
-        # Greedy action: choose best move
-        best_value = -float('inf')
-        best_action = None
-        
-        for action in valid_moves:
-            # Simulate move and observe status (using temp status)
-            temp_board = list(state)
-            temp_board[action] = 1 # Agent move
-            
-            # Status right after agent move
-            next_state = tuple(temp_board)
-            
-            state_value = get_value(next_state, v_table) # (Usa la v_table passata)
-            
-            if state_value > best_value:
-                best_value = state_value
-                best_action = action
-                
-        return best_action
+        # Greedy action: value of every afterstate (grid right after the agent
+        # move) in one gather, first best move on ties.
+        # (the .argmax() method skips the dispatch overhead of np.argmax)
+        afterstates = code + pow3[valid_moves]
+        if symmetric:
+            afterstates = board.CANONICAL[afterstates]
+        return valid_moves[lookup(v_table, afterstates).argmax()]
 
 ## ------------------------------------------------------------------
 ## SECTION 3: TRAINING FUNCTION
 ## ------------------------------------------------------------------
 
-def train_agent(env, num_episodes, alpha, epsilon_start, epsilon_decay, epsilon_min):
+def train_agent(env, num_episodes, alpha, epsilon_start, epsilon_decay, epsilon_min, symmetric=False):
     """
     Trains the agent using TD(0) to learn the V-table.
+    Values belong to afterstates, the grids choose_action compares.
+    With symmetric=True the V-table is indexed by canonical grids.
     """
+    check_symmetric(env, symmetric)
     print("Start training...") 
+    start_time = time.time()
     
     # value table
-    v_table = {} 
+    v_table = new_v_table(env)
+    pow3 = env.rules.pow3
     epsilon = epsilon_start
 
     for episode in range(num_episodes):
         
         # Reset for new match
-        state, info = env.reset()
+        env.reset()
         
         terminated = False
-        last_state = state 
+        last_afterstate = None
         while not terminated:
             valid_moves = env.get_valid_moves()
-            action = choose_action(state, valid_moves, v_table, epsilon)
+            action = choose_action(env.code, valid_moves, v_table, epsilon, pow3, symmetric)
+            afterstate = state_key(env.code + int(pow3[action]), symmetric)
             
             # Take action in the environment
             # Player 2 move will be also managed
             next_state, reward, terminated, truncated, info = env.step(action)
             
             # --- Update V function ---
-            # V(s_t) <- V(s_t) + alpha * [V(s_t+1) - V(s_t)] 
-            
-            v_s_t = get_value(last_state, v_table)
-            if terminated:
-                v_s_t_plus_1 = reward
-            else:
-                v_s_t_plus_1 = get_value(next_state, v_table)
+            # V(a_t-1) <- V(a_t-1) + alpha * [V(a_t) - V(a_t-1)]
+            if last_afterstate is not None:
+                v_table[last_afterstate] += alpha * (v_table[afterstate] - v_table[last_afterstate])
 
-            # Apply formula
-            v_table[last_state] = v_s_t + alpha * (v_s_t_plus_1 - v_s_t)
+            # Last move of the match: the target is the final reward
+            if terminated:
+                v_table[afterstate] += alpha * (reward - v_table[afterstate])
             
             # Update state for next cicle
-            last_state = next_state
-            state = next_state # including player 2 move
+            last_afterstate = afterstate
 
         # Reduce exploration
         if epsilon > epsilon_min:
@@ -209,65 +256,157 @@ def train_agent(env, num_episodes, alpha, epsilon_start, epsilon_decay, epsilon_
             print(f"Episode {episode + 1}/{num_episodes} completed. Epsilon: {epsilon:.4f}")
 
     print("\nTraining done!") 
-    print(f"V-table has been trainend in {len(v_table)} states.")
+    num_trained = len(v_table) if isinstance(v_table, dict) else np.count_nonzero(v_table != 0.5)
+    print(f"V-table has been trainend in {num_trained} states.")
+    print(f"Training time: {time.time() - start_time:.2f} seconds")
     return v_table
 
 ## ------------------------------------------------------------------
 ## SECTION 4: TEST FUNCTION
 ## ------------------------------------------------------------------
 
-def test_agent(env, v_table, num_test_games):
+def wilson_interval(count, n, z=1.96):
     """
-    Executes test games between the trained agent and Player 2.
+    Wilson score interval (95% with z=1.96) for a rate count/n: unlike the
+    normal approximation it stays inside [0, 1] for rates close to 0 or 1
     """
-    
-    print("\nStart test: Agent (X) plays against Player 2 (O).")
+    p = count / n
+    denom = 1 + z ** 2 / n
+    centre = (p + z ** 2 / (2 * n)) / denom
+    half = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denom
+    return centre - half, centre + half
 
-    # Only greedy moves
-    epsilon_test = 0.0 
+def evaluate_agent(env, v_table, num_games, symmetric=False, seed=None):
+    """
+    Headless evaluation: num_games greedy games against the random player,
+    all played at once as (num_games, size) NumPy arrays. Every game is at
+    the same move number, so each turn is one batched move for the games
+    still running: the agent takes the argmax of the afterstate values
+    (same choice as choose_action with epsilon=0), Player 2 the argmax of
+    random scores over its free cells (a uniform random move).
+    Returns counts of wins/draws/losses, their rates with Wilson intervals
+    and games per second.
+    """
+    check_symmetric(env, symmetric)
+    rng = np.random.default_rng(seed)
+    start_time = time.time()
+
+    pow3 = env.rules.pow3
+    boards = np.zeros((num_games, env.size), dtype=np.int8)
+    codes = np.zeros(num_games, dtype=np.int64)
+    masks = {1: np.zeros(num_games, dtype=np.int64), -1: np.zeros(num_games, dtype=np.int64)}
+    rewards = np.full(num_games, 0.5) # games that fill the grid are draws
+    active = np.arange(num_games)
+    player = 1
+
+    for move in range(env.size):
+        legal = boards[active] == 0
+        if player == 1:
+            afterstates = np.where(legal, codes[active, None] + pow3, 0)
+            if symmetric:
+                afterstates = board.CANONICAL[afterstates]
+            scores = np.where(legal, lookup(v_table, afterstates), -np.inf)
+        else:
+            scores = np.where(legal, rng.random(legal.shape), -1.0)
+        actions = scores.argmax(axis=1)
+
+        boards[active, actions] = player
+        codes[active] += board.DIGIT[player] * pow3[actions]
+        masks[player][active] |= np.int64(1) << actions
+
+        # Only the player who just moved can have completed a line
+        player_masks = masks[player][active]
+        won = np.zeros(len(active), dtype=bool)
+        for line in env.rules.line_masks:
+            won |= (player_masks & line) == line
+        rewards[active[won]] = 1.0 if player == 1 else 0.0
+        active = active[~won]
+        if len(active) == 0:
+            break
+        player = -player
+
+    elapsed = time.time() - start_time
+    counts = {"wins": int(np.count_nonzero(rewards == 1.0)),
+              "draws": int(np.count_nonzero(rewards == 0.5)),
+              "losses": int(np.count_nonzero(rewards == 0.0))}
+    return {
+        "games": num_games,
+        "counts": counts,
+        "rates": {name: count / num_games for name, count in counts.items()},
+        "intervals": {name: wilson_interval(count, num_games) for name, count in counts.items()},
+        "games_per_second": num_games / max(elapsed, 1e-9),
+    }
+
+def exact_test(v_table, symmetric=False):
+    """
+    Exact win/draw/loss probabilities of the greedy policy on v_table against
+    the random Player 2 (3x3 only): one memoized backward pass over the
+    game tree, see tictactoe_eval.exact_outcome. Deterministic, unlike the
+    sampled games of evaluate_agent.
+    """
+    pow3 = np.array(board.POW3, dtype=np.int64)
+    def greedy(code):
+        return int(choose_action(code, np.array(board.valid_actions(code)), v_table, 0.0, pow3, symmetric))
+    return tictactoe_eval.exact_outcome(greedy)[0]
+
+def trace_game(env, v_table, symmetric=False):
+    """
+    Plays a single greedy game against Player 2, rendering every move.
+    """
+    check_symmetric(env, symmetric)
+    state, info = env.reset()
+    terminated = False
 
-    wins = 0
-    losses = 0
-    draws = 0
+    print("\n--- New  match ---")
+    env.render()
+
+    while not terminated:
+        # Agent chooses best move
+        valid_moves = env.get_valid_moves()
+        action = choose_action(env.code, valid_moves, v_table, 0.0, env.rules.pow3, symmetric)
+
+        print(f"\nAgent chooses the move: {action}")
+
+        # Execute move (including player 2 move)
+        next_state, reward, terminated, truncated, info = env.step(action)
 
-    for _ in range(num_test_games):
-        state, info = env.reset()
-        terminated = False
-        
-        print("\n--- New  match ---")
         env.render()
-        
-        while not terminated:
-            # Agent chooses best move
-            valid_moves = env.get_valid_moves()
-            action = choose_action(state, valid_moves, v_table, epsilon_test)
-            
-            print(f"\nAgent chooses the move: {action}") 
-            
-            # Execute move (including player 2 move)
-            next_state, reward, terminated, truncated, info = env.step(action)
-            
-            env.render()
-            
-            if terminated:
-                print("")
-                if reward == 1.0:
-                    print("--> Agent won (X)!") 
-                    wins += 1
-                elif reward == 0.0:
-                    print("--> Player 2 (O) won!") 
-                    losses += 1
-                else: 
-                    print("--> Draw!")
-                    draws += 1
-            
-            state = next_state
+
+        if terminated:
+            print("")
+            if reward == 1.0:
+                print("--> Agent won (X)!")
+            elif reward == 0.0:
+                print("--> Player 2 (O) won!")
+            else:
+                print("--> Draw!")
+
+        state = next_state
+    return reward
+
+def test_agent(env, v_table, num_test_games, symmetric=False, trace=False):
+    """
+    Executes test games between the trained agent and Player 2.
+    Headless and batched (see evaluate_agent); trace=True also shows one
+    rendered game move by move.
+    """
+    
+    print(f"\nStart test: Agent (X) plays {num_test_games} games against Player 2 (O).")
+    if trace:
+        trace_game(env, v_table, symmetric)
+
+    results = evaluate_agent(env, v_table, num_test_games, symmetric)
 
     print("\n--- Results ---") 
-    print(f"Number of matches: {num_test_games}")
-    print(f"Wins (X): {wins}")
-    print(f"Defeats (X): {losses}")
-    print(f"Draws: {draws}")
+    print(f"Number of matches: {results['games']} ({results['games_per_second']:,.0f} games/s)")
+    for name, label in (("wins", "Wins (X)"), ("losses", "Defeats (X)"), ("draws", "Draws")):
+        low, high = results["intervals"][name]
+        print(f"{label}: {results['counts'][name]} ({results['rates'][name]:.2%}, 95% CI {low:.2%} - {high:.2%})")
+
+    if env.size == board.SIZE:
+        wins, draws, losses = exact_test(v_table, symmetric)
+        print(f"Exact: wins {wins:.2%}, defeats {losses:.2%}, draws {draws:.2%}")
+    return results
 
 
 ## ------------------------------------------------------------------
@@ -282,7 +421,11 @@ if __name__ == "__main__":
     PARAM_EPSILON_START = 1.0
     PARAM_EPSILON_DECAY = 0.9999
     PARAM_EPSILON_MIN = 0.01
-    PARAM_TEST_GAMES = 10
+    PARAM_TEST_GAMES = 100000
+    # "python ticatactoe.py symmetric" shares values between symmetric grids
+    PARAM_SYMMETRIC = "symmetric" in sys.argv[1:]
+    # "python ticatactoe.py trace" also renders one test game move by move
+    PARAM_TRACE = "trace" in sys.argv[1:]
     
     # 2. Create the environment
     ambiente_gioco = TicTacToeEnv()
@@ -294,8 +437,9 @@ if __name__ == "__main__":
         PARAM_ALPHA, 
         PARAM_EPSILON_START, 
         PARAM_EPSILON_DECAY, 
-        PARAM_EPSILON_MIN
+        PARAM_EPSILON_MIN,
+        PARAM_SYMMETRIC
     )
     
     # 4. Start test
-    test_agent(ambiente_gioco, tabella_valori_addestrata, PARAM_TEST_GAMES)
\ No newline at end of file
+    test_agent(ambiente_gioco, tabella_valori_addestrata, PARAM_TEST_GAMES, PARAM_SYMMETRIC, PARAM_TRACE)
\ No newline at end of file
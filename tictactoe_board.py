@@ -0,0 +1,116 @@
+import numpy as np
+
+SIZE = 9
+NUM_CODES = 3 ** SIZE
+
+# Cifra in base 3 di ogni casella: 0 vuota, 1 giocatore 1 (X), 2 giocatore -1 (O)
+DIGIT = {0: 0, 1: 1, -1: 2}
+POW3 = [3 ** i for i in range(SIZE)]
+
+# Righe, colonne e diagonali come indici di casella
+LINES = np.array([
+    [0, 1, 2], [3, 4, 5], [6, 7, 8],
+    [0, 3, 6], [1, 4, 7], [2, 5, 8],
+    [0, 4, 8], [2, 4, 6],
+])
+
+def _build_tables():
+    """
+    Decodifica in blocco tutti i 3^9 codici e calcola per ognuno vincitore
+    e numero di caselle vuote. Molti codici non sono partite raggiungibili
+    (es. due vincitori): le tabelle li coprono comunque, non costano nulla.
+    """
+    codes = np.arange(NUM_CODES)
+    digits = (codes[:, None] // np.array(POW3)) % 3
+    boards = np.where(digits == 2, -1, digits).astype(np.int8)
+
+    lines = boards[:, LINES]
+    x_wins = np.any(np.all(lines == 1, axis=2), axis=1)
+    o_wins = np.any(np.all(lines == -1, axis=2), axis=1)
+
+    winner = np.zeros(NUM_CODES, dtype=np.int8)
+    winner[x_wins] = 1
+    winner[o_wins & ~x_wins] = -1
+    num_empty = np.count_nonzero(boards == 0, axis=1).astype(np.int8)
+    return boards, winner, num_empty
+
+# BOARDS[code] -> griglia (9,) in {0, 1, -1}
+# WINNER[code] -> 1 se X ha un tris, -1 se ce l'ha O, 0 altrimenti
+# NUM_EMPTY[code] -> caselle libere (0 = griglia piena)
+BOARDS, WINNER, NUM_EMPTY = _build_tables()
+
+def _build_symmetries():
+    """
+    Le 8 simmetrie del quadrato (gruppo D4) come permutazioni delle caselle:
+    la griglia trasformata e' board[perm]. Per ogni codice si tengono il
+    rappresentante canonico (il codice minimo tra gli 8 trasformati) e la
+    simmetria che lo produce.
+    """
+    cells = np.arange(SIZE).reshape(3, 3)
+    perms = []
+    for grid in (cells, cells.T):
+        for k in range(4):
+            perms.append(np.rot90(grid, k).ravel())
+    perms = np.array(perms)
+
+    transformed = np.zeros((len(perms), NUM_CODES), dtype=np.int64)
+    for t, perm in enumerate(perms):
+        transformed[t] = (np.where(BOARDS[:, perm] == -1, 2, BOARDS[:, perm]) * np.array(POW3)).sum(axis=1)
+    transform = np.argmin(transformed, axis=0)
+    canonical = transformed[transform, np.arange(NUM_CODES)]
+    return perms, canonical, transform
+
+# SYMMETRIES[t] -> permutazione delle caselle (la trasformata t e' board[SYMMETRIES[t]])
+# CANONICAL[code] -> codice canonico della classe di simmetria
+# TRANSFORM[code] -> t tale che CANONICAL[code] e' la trasformata t di code
+SYMMETRIES, CANONICAL, TRANSFORM = _build_symmetries()
+
+# Copie in liste per i cicli scalari (vedi exploration.ExplorationNoise)
+_winner = WINNER.tolist()
+_num_empty = NUM_EMPTY.tolist()
+_canonical = CANONICAL.tolist()
+_transform = TRANSFORM.tolist()
+# Azione sulla griglia canonica -> azione sulla griglia originale, e viceversa
+_to_original = SYMMETRIES.tolist()
+_to_canonical = np.argsort(SYMMETRIES, axis=1).tolist()
+
+def encode(board):
+    """Codice base 3 di una griglia (tupla, lista o array di 0/1/-1)"""
+    return sum(DIGIT[int(x)] * p for x, p in zip(board, POW3))
+
+def decode(code):
+    """Griglia come tupla di 0/1/-1"""
+    return tuple(BOARDS[code].tolist())
+
+def play(code, action, player):
+    """Codice della griglia dopo che player occupa la casella action (che deve essere libera)"""
+    return code + DIGIT[player] * POW3[action]
+
+def is_free(code, action):
+    return (code // POW3[action]) % 3 == 0
+
+def valid_actions(code):
+    return [a for a in range(SIZE) if (code // POW3[a]) % 3 == 0]
+
+def check_win(code, player):
+    return _winner[code] == player
+
+def winner(code):
+    return _winner[code]
+
+def is_full(code):
+    return _num_empty[code] == 0
+
+def is_terminal(code):
+    return _winner[code] != 0 or _num_empty[code] == 0
+
+def canonical(code):
+    return _canonical[code]
+
+def canonical_action(code, action):
+    """Casella della griglia canonica che corrisponde ad action sulla griglia code"""
+    return _to_canonical[_transform[code]][action]
+
+def original_action(code, action):
+    """Casella della griglia code che corrisponde ad action sulla sua griglia canonica"""
+    return _to_original[_transform[code]][action]
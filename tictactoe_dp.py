@@ -1,62 +1,106 @@
+import os
+import sys
+import time
+import tracemalloc
 import numpy as np
 import itertools
+import tictactoe_board as board
+from mnk_board import MNKBoard
+from alphabeta import AlphaBetaSolver
+import tictactoe_eval
+
+# Modello di transizione compilato, salvato accanto allo script
+MODEL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tictactoe_model.npz")
+MODEL_FILE_SYM = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tictactoe_model_sym.npz")
+MODEL_VERSION = 2 # 2: il file registra anche symmetric
+
+# Motori di value iteration (vedi TicTacToeDP.value_iteration)
+METHODS = ("loop", "vectorized", "backward", "graph")
 
 ## ------------------------------------------------------------------
 ## 1. DEFINIZIONE DELL'AMBIENTE E DELLE REGOLE
 ## ------------------------------------------------------------------
 
 class TicTacToeDP:
-    def __init__(self):
+    def __init__(self, model_file=MODEL_FILE, symmetric=False, rows=3, cols=3, k=3, build_model=True):
         # 0: Vuoto, 1: Agente (X), -1: Avversario (O)
-        self.empty_board = tuple([0] * 9)
+        # Gli stati sono codici interi in base 3 (vedi tictactoe_board.py):
+        # vittoria e pareggio diventano una lettura in tabella
+        self.empty_board = board.encode([0] * 9)
+        # Regole di un m,n,k-game generico (griglia rows x cols, vince chi allinea k segni)
+        self.rules = MNKBoard(rows, cols, k)
+        self.classic = (rows, cols, k) == (3, 3, 3)
+        # Con symmetric=True ogni griglia è rappresentata dalla sua forma canonica
+        # rispetto a rotazioni e riflessioni: circa 8 volte meno stati
+        self.symmetric = symmetric
+        self.canonical = board.canonical if symmetric else (lambda code: code)
+        if symmetric and model_file == MODEL_FILE:
+            model_file = MODEL_FILE_SYM
         self.gamma = 0.9  # Fattore di sconto
         self.states = set()
+        self._graph = None # grafo degli stati, costruito alla prima richiesta (vedi graph)
         self.V = {}       # Value Function V(s)
         self.policy = {}  # Policy pi(s) -> action
+        self.build_model = build_model
+
+        if not build_model:
+            # Solo regole e play_game con una policy esterna (es. alpha-beta):
+            # niente enumerazione degli stati, che sulle griglie grandi esplode
+            return
         
-        # Generiamo tutti gli stati possibili (raggiungibili)
-        print("Generazione degli stati in corso...")
-        self.generate_all_states(self.empty_board, 1)
+        if not self.classic:
+            # Griglie più grandi (milioni di stati): niente dizionari né modello
+            # compilato, solo il grafo degli stati e array (vedi solve_graph)
+            print("Generazione degli stati in corso...")
+            self.generate_all_states()
+            print(f"Stati totali trovati: {self.graph.num_states}")
+            return
+
+        # Stati e modello di transizione: dalla cache su disco se c'è,
+        # altrimenti generazione di tutti gli stati raggiungibili + compilazione
+        if model_file is not None and self.load_model(model_file):
+            print(f"Modello caricato da {model_file}")
+        else:
+            print("Generazione degli stati in corso...")
+            self.generate_all_states()
+            self.compile_model()
+            if model_file is not None:
+                self.save_model(model_file)
         print(f"Stati totali trovati: {len(self.states)}")
         
         # Inizializzazione V(s) = 0
         for s in self.states:
             self.V[s] = 0.0
             
-    def generate_all_states(self, board, current_player):
+    def generate_all_states(self):
         """
-        DFS ricorsiva per trovare tutti gli stati legali del gioco.
+        Enumerazione iterativa per livelli (numero di mosse) di tutti gli stati
+        legali del gioco, sui codici interi: vedi MNKBoard.enumerate_states.
+        self.graph tiene anche l'indice padre/figlio e l'ordine topologico.
         """
-        if board in self.states:
-            return
-        
-        self.states.add(board)
-        
-        # Se il gioco è finito, stop
-        if self.check_win(board, 1) or self.check_win(board, -1) or 0 not in board:
-            return
+        canonical = None
+        if self.symmetric:
+            canonical = (lambda codes: board.CANONICAL[codes]) if self.classic else self.rules.canonical
+        self._graph = self.rules.enumerate_states(canonical=canonical)
+        if self.classic:
+            self.states = set(self._graph.codes.tolist())
 
-        # Genera mosse possibili
-        possible_moves = [i for i, x in enumerate(board) if x == 0]
-        
-        for action in possible_moves:
-            new_board = list(board)
-            new_board[action] = current_player
-            self.generate_all_states(tuple(new_board), -1 if current_player == 1 else 1)
+    @property
+    def graph(self):
+        """
+        Grafo degli stati (MNKBoard.enumerate_states). Con il modello caricato
+        dalla cache non viene enumerato subito: lo si genera al primo accesso.
+        """
+        if self._graph is None:
+            self.generate_all_states()
+        return self._graph
 
-    def check_win(self, board, player):
+    def check_win(self, state, player):
         """Controlla se il 'player' ha vinto"""
-        b = np.array(board).reshape(3, 3)
-        # Righe, Colonne, Diagonali
-        for i in range(3):
-            if np.all(b[i, :] == player) or np.all(b[:, i] == player):
-                return True
-        if np.all(np.diag(b) == player) or np.all(np.diag(np.fliplr(b)) == player):
-            return True
-        return False
+        return board.check_win(state, player)
 
     def get_valid_actions(self, state):
-        return [i for i, x in enumerate(state) if x == 0]
+        return board.valid_actions(state)
 
     ## ------------------------------------------------------------------
     ## 2. MODELLO DI TRANSIZIONE (DYNAMICS) p(s', r | s, a)
@@ -67,83 +111,170 @@ class TicTacToeDP:
         Restituisce una lista di possibili (prob, next_state, reward, done).
         Simula: Mossa Agente -> (Se vince: Fine) -> Mossa Avversario Random -> (Se vince: Fine) -> Next State
         """
-        board_list = list(state)
-        
         # 1. Mossa Agente
-        board_list[action] = 1 
-        new_state = tuple(board_list)
+        new_state = board.play(state, action, 1)
         
         # Controllo vittoria Agente
-        if self.check_win(new_state, 1):
-            return [(1.0, new_state, 1.0, True)] # Prob 100%, Reward +1, Terminato
+        if board.check_win(new_state, 1):
+            return [(1.0, self.canonical(new_state), 1.0, True)] # Prob 100%, Reward +1, Terminato
             
         # Controllo Pareggio (nessuna mossa rimasta)
-        valid_opp_moves = [i for i, x in enumerate(new_state) if x == 0]
+        valid_opp_moves = board.valid_actions(new_state)
         if not valid_opp_moves:
-            return [(1.0, new_state, 0.0, True)] # Pareggio, Reward 0
+            return [(1.0, self.canonical(new_state), 0.0, True)] # Pareggio, Reward 0
             
         # 2. Mossa Avversario (Gioca Random, come nel file gym originale)
         outcomes = []
         prob = 1.0 / len(valid_opp_moves) # Probabilità uniforme
         
         for opp_action in valid_opp_moves:
-            opp_board_list = list(new_state)
-            opp_board_list[opp_action] = -1
-            final_state = tuple(opp_board_list)
+            final_state = board.play(new_state, opp_action, -1)
             
             reward = 0.0
             done = False
             
             # Controllo vittoria Avversario
-            if self.check_win(final_state, -1):
+            if board.check_win(final_state, -1):
                 reward = -1.0 # Penalità per sconfitta
                 done = True
-            elif 0 not in final_state:
+            elif board.is_full(final_state):
                 reward = 0.0 # Pareggio
                 done = True
                 
-            outcomes.append((prob, final_state, reward, done))
+            outcomes.append((prob, self.canonical(final_state), reward, done))
             
         return outcomes
 
+    def compile_model(self):
+        """
+        Compila transition() per tutti gli stati in array piatti, una volta sola.
+        Gli stati diventano id 0..N-1 (self.codes[id] = codice della griglia):
+          state_ptr[id]:state_ptr[id+1]      righe (stato, azione) dello stato
+          sa_action[riga]                    azione della riga
+          outcome_ptr[riga]:outcome_ptr[riga+1]  esiti della riga
+          prob, next_id, reward, done        un elemento per esito
+        Hanno righe solo gli stati non terminali in cui tocca all'agente
+        (numero dispari di caselle vuote): dagli altri transition() farebbe
+        muovere X due volte di fila, e nessuna transizione dell'agente ci arriva.
+        Con le simmetrie, delle azioni che portano alla stessa griglia canonica
+        (es. i quattro angoli sulla griglia vuota) si tiene solo la prima.
+        """
+        self.codes = np.array(sorted(self.states), dtype=np.int64)
+        index = {code: i for i, code in enumerate(self.codes.tolist())}
+
+        state_ptr, sa_action, outcome_ptr = [0], [], [0]
+        prob, next_id, reward, done = [], [], [], []
+        for s in self.codes.tolist():
+            if not board.is_terminal(s) and board.NUM_EMPTY[s] % 2 == 1:
+                afterstates = set()
+                for a in board.valid_actions(s):
+                    if self.symmetric:
+                        afterstate = board.canonical(board.play(s, a, 1))
+                        if afterstate in afterstates:
+                            continue
+                        afterstates.add(afterstate)
+                    for p, next_s, r, d in self.transition(s, a):
+                        prob.append(p)
+                        next_id.append(index[next_s])
+                        reward.append(r)
+                        done.append(d)
+                    sa_action.append(a)
+                    outcome_ptr.append(len(prob))
+            state_ptr.append(len(sa_action))
+
+        self.state_ptr = np.array(state_ptr, dtype=np.int64)
+        self.sa_action = np.array(sa_action, dtype=np.int64)
+        self.outcome_ptr = np.array(outcome_ptr, dtype=np.int64)
+        self.prob = np.array(prob)
+        self.next_id = np.array(next_id, dtype=np.int64)
+        self.reward = np.array(reward)
+        self.done = np.array(done, dtype=bool)
+
+    MODEL_ARRAYS = ("codes", "state_ptr", "sa_action", "outcome_ptr", "prob", "next_id", "reward", "done")
+
+    def save_model(self, path):
+        np.savez(path, version=MODEL_VERSION, symmetric=self.symmetric,
+                 **{name: getattr(self, name) for name in self.MODEL_ARRAYS})
+
+    def load_model(self, path):
+        """
+        Carica il modello compilato; False se il file manca, è di un'altra
+        versione o è stato compilato con un altro valore di symmetric
+        (griglie canoniche o complete: i codici non sono intercambiabili)
+        """
+        if not os.path.exists(path):
+            return False
+        with np.load(path) as data:
+            if int(data["version"]) != MODEL_VERSION:
+                return False
+            if bool(data["symmetric"]) != self.symmetric:
+                print(f"{path}: modello compilato con symmetric={bool(data['symmetric'])}, lo rigenero")
+                return False
+            for name in self.MODEL_ARRAYS:
+                setattr(self, name, data[name])
+        self.states = set(self.codes.tolist())
+        return True
+
     ## ------------------------------------------------------------------
     ## 3. ALGORITMO DI VALUE ITERATION
     ## ------------------------------------------------------------------
 
-    def value_iteration(self, theta=1e-4):
+    def value_iteration(self, theta=1e-4, method="loop"):
         """
         Implementazione basata sulla logica di Policy Evaluation/Improvement 
         (Vedi Slide 10 e 14)
+        method:
+          loop        sweep in Python sugli id del modello compilato
+          vectorized  sweep di Jacobi come operazioni su array (vedi sweep())
+          backward    Gauss-Seidel per numero di mosse: una sola passata
+          graph       backward induction direttamente sul grafo degli stati,
+                      per qualsiasi m,n,k (l'unico metodo fuori dal 3x3)
         """
+        if method not in METHODS:
+            raise ValueError(f"Metodo sconosciuto: {method}")
+        if method == "graph":
+            return self.solve_graph()
+        if not self.classic:
+            raise ValueError("Su griglie diverse dal 3x3 classico è disponibile solo il metodo 'graph'")
+        if method == "vectorized":
+            return self.value_iteration_vectorized(theta)
+        if method == "backward":
+            return self.backward_induction()
+
         print("Inizio Value Iteration...")
+        # Copie in liste per il ciclo scalare (vedi ExplorationNoise)
+        state_ptr = self.state_ptr.tolist()
+        outcome_ptr = self.outcome_ptr.tolist()
+        prob = self.prob.tolist()
+        next_id = self.next_id.tolist()
+        reward = self.reward.tolist()
+        done = self.done.tolist()
+        gamma = self.gamma
+
+        def action_value(row, V):
+            # sum [ p(s',r|s,a) * (r + gamma * V(s')) ], con V(s') = 0 se done
+            value = 0.0
+            for k in range(outcome_ptr[row], outcome_ptr[row + 1]):
+                v_next = 0 if done[k] else V[next_id[k]]
+                value += prob[k] * (reward[k] + gamma * v_next)
+            return value
+
+        V = [0.0] * len(self.codes)
         iteration = 0
         while True:
             delta = 0
-            for s in self.states:
-                # Se è uno stato terminale (già vinto/perso/pieno), V(s) = 0
-                # Nota: gestiamo i reward nelle transizioni, quindi ignoriamo l'update per i terminali puri
-                if self.check_win(s, 1) or self.check_win(s, -1) or 0 not in s:
+            for s in range(len(V)):
+                # Stati senza righe (terminali o col turno dell'avversario): V(s) resta 0
+                rows = range(state_ptr[s], state_ptr[s + 1])
+                if not rows:
                     continue
                 
-                v_old = self.V[s]
+                v_old = V[s]
                 
                 # Trova l'azione che massimizza il valore atteso (Bellman Optimality Equation)
                 # V(s) = max_a sum [ p(s',r|s,a) * (r + gamma * V(s')) ]
-                actions = self.get_valid_actions(s)
-                action_values = []
-                
-                for a in actions:
-                    expected_value = 0
-                    outcomes = self.transition(s, a)
-                    for prob, next_s, reward, done in outcomes:
-                        # Se done, V(next_s) è 0
-                        v_next = 0 if done else self.V[next_s]
-                        expected_value += prob * (reward + self.gamma * v_next)
-                    action_values.append(expected_value)
-                
-                best_value = max(action_values) if action_values else 0
-                self.V[s] = best_value
-                delta = max(delta, abs(v_old - self.V[s]))
+                V[s] = max(action_value(row, V) for row in rows)
+                delta = max(delta, abs(v_old - V[s]))
             
             iteration += 1
             if delta < theta:
@@ -153,88 +284,337 @@ class TicTacToeDP:
         # Estrazione della Policy Ottima (Greedy rispetto a V)
         # Slide 11: pi'(s) = argmax_a Q(s,a)
         print("Estrazione della Policy Ottima...")
-        for s in self.states:
-            if self.check_win(s, 1) or self.check_win(s, -1) or 0 not in s:
+        codes = self.codes.tolist()
+        sa_action = self.sa_action.tolist()
+        for s in range(len(V)):
+            rows = range(state_ptr[s], state_ptr[s + 1])
+            if not rows:
                 continue
-                
-            actions = self.get_valid_actions(s)
-            best_action = None
-            best_val = -float('inf')
-            
-            for a in actions:
-                val = 0
-                outcomes = self.transition(s, a)
-                for prob, next_s, reward, done in outcomes:
-                    v_next = 0 if done else self.V[next_s]
-                    val += prob * (reward + self.gamma * v_next)
-                
-                if val > best_val:
-                    best_val = val
-                    best_action = a
-            
-            self.policy[s] = best_action
+            best_row = max(rows, key=lambda row: action_value(row, V))
+            self.policy[codes[s]] = sa_action[best_row]
+
+        self.V = dict(zip(codes, V))
+
+    ## ------------------------------------------------------------------
+    ## 3b. VALUE ITERATION VETTORIALE SUL GRAFO COMPILATO
+    ## ------------------------------------------------------------------
+
+    def row_values(self, V, outcomes=None):
+        """
+        Q di ogni riga (stato, azione): prodotto elemento per elemento sugli esiti
+        e somma per segmenti di outcome_ptr. Con outcomes (indici di esiti) si
+        calcolano solo quegli esiti; le altre righe restano a 0.
+        """
+        if outcomes is None:
+            v_next = np.where(self.done, 0.0, V[self.next_id])
+            return np.add.reduceat(self.prob * (self.reward + self.gamma * v_next), self.outcome_ptr[:-1])
+
+        v_next = np.where(self.done[outcomes], 0.0, V[self.next_id[outcomes]])
+        backup = self.prob[outcomes] * (self.reward[outcomes] + self.gamma * v_next)
+        return np.bincount(self.outcome_row[outcomes], weights=backup, minlength=len(self.sa_action))
+
+    def _prepare_arrays(self):
+        # Indici ausiliari derivati dai puntatori: riga di ogni esito, stato di ogni riga
+        num_actions = np.diff(self.state_ptr)
+        self.active = np.flatnonzero(num_actions > 0)       # stati con almeno un'azione
+        self.row_starts = self.state_ptr[self.active]         # inizio del segmento di ogni stato attivo
+        self.row_state = np.repeat(np.arange(len(self.codes)), num_actions)
+        self.outcome_row = np.repeat(np.arange(len(self.sa_action)), np.diff(self.outcome_ptr))
+
+    def sweep(self, V):
+        """Un backup di Bellman su tutti gli stati: max segmentato sulle azioni legali"""
+        new_V = V.copy()
+        new_V[self.active] = np.maximum.reduceat(self.row_values(V), self.row_starts)
+        return new_V
+
+    def value_iteration_vectorized(self, theta=1e-4):
+        self._prepare_arrays()
+        print("Inizio Value Iteration (vettoriale)...")
+        V = np.zeros(len(self.codes))
+        iteration = 0
+        while True:
+            new_V = self.sweep(V)
+            delta = np.max(np.abs(new_V - V))
+            V = new_V
+            iteration += 1
+            if delta < theta:
+                print(f"Convergenza raggiunta in {iteration} iterazioni.")
+                break
+        self.extract_policy(V)
+
+    def backward_induction(self):
+        """
+        Gauss-Seidel ordinato per numero di caselle vuote: ogni mossa dell'agente
+        porta a uno stato con meno caselle vuote (o terminale), quindi aggiornando
+        i livelli dal più pieno al più vuoto ogni V(s') è già definitivo quando
+        serve. Il grafo è aciclico e basta una passata, un livello alla volta.
+        """
+        self._prepare_arrays()
+        print("Inizio Backward Induction...")
+        V = np.zeros(len(self.codes))
+        level = board.NUM_EMPTY[self.codes]
+        row_level = level[self.row_state]
+        outcome_level = row_level[self.outcome_row]
+
+        levels = np.unique(level[self.active])
+        for empty in levels:
+            rows = np.flatnonzero(row_level == empty)
+            q = self.row_values(V, np.flatnonzero(outcome_level == empty))[rows]
+            # Le righe di uno stesso stato sono contigue: segmento per ogni cambio di stato
+            states = self.row_state[rows]
+            starts = np.flatnonzero(np.r_[True, states[1:] != states[:-1]])
+            V[states[starts]] = np.maximum.reduceat(q, starts)
+        print(f"Valori esatti in una passata su {len(levels)} livelli.")
+        self.extract_policy(V)
+
+    def extract_policy(self, V):
+        """Policy greedy rispetto a V: argmax segmentato (a parità, la prima azione)"""
+        print("Estrazione della Policy Ottima...")
+        q = self.row_values(V)
+        best_q = np.maximum.reduceat(q, self.row_starts)
+        is_best = q >= np.repeat(best_q, np.diff(self.state_ptr)[self.active]) - 1e-12
+        row_ids = np.arange(len(q))
+        best_row = np.minimum.reduceat(np.where(is_best, row_ids, len(q)), self.row_starts)
+
+        codes = self.codes.tolist()
+        self.policy = dict(zip(self.codes[self.active].tolist(), self.sa_action[best_row].tolist()))
+        self.V = dict(zip(codes, V.tolist()))
+
+    ## ------------------------------------------------------------------
+    ## 3c. BACKWARD INDUCTION SUL GRAFO DEGLI STATI (qualsiasi m,n,k)
+    ## ------------------------------------------------------------------
+
+    def solve_graph(self):
+        """
+        Stessa dinamica di transition() (mossa dell'agente, poi risposta casuale
+        uniforme), ma senza compilare gli esiti di ogni coppia (stato, azione):
+        sul 4x4 sarebbero centinaia di milioni. Si lavora sugli archi del grafo,
+        dai livelli più pieni a quelli vuoti, con due array di valori:
+          W(a)  griglia a dopo la mossa dell'agente, media sulle risposte di O
+                (-1 se O vince, 0 se pareggia, gamma * V(s') altrimenti)
+          V(s)  griglia s con l'agente di turno, max sulle mosse
+                (+1 se X vince, 0 se pareggia, W(a) altrimenti)
+        """
+        g = self.graph
+        print("Inizio Backward Induction sul grafo...")
+        V = np.zeros(g.num_states)
+        W = np.zeros(g.num_states)
+        policy = np.full(g.num_states, -1, dtype=np.int8)
+        degree = np.diff(g.child_ptr)
+
+        for move in reversed(range(len(g.level_ptr) - 1)):
+            lo, hi = g.level_ptr[move], g.level_ptr[move + 1]
+            open_ids = lo + np.flatnonzero(~g.terminal[lo:hi])
+            if len(open_ids) == 0:
+                continue
+            edge_lo, edge_hi = g.child_ptr[lo], g.child_ptr[hi]
+            children = g.children[edge_lo:edge_hi]
+            # Gli stati terminali non hanno archi: i segmenti degli altri sono contigui
+            starts = g.child_ptr[open_ids] - edge_lo
+            done = g.terminal[children]
+
+            if move % 2 == 1:
+                # Tocca a O (casuale): media sulle risposte
+                values = np.where(g.winner[children] == -1, -1.0, np.where(done, 0.0, self.gamma * V[children]))
+                W[open_ids] = np.add.reduceat(values, starts) / degree[open_ids]
+            else:
+                # Tocca all'agente: max sulle mosse, a parità la prima
+                values = np.where(g.winner[children] == 1, 1.0, np.where(done, 0.0, W[children]))
+                V[open_ids] = np.maximum.reduceat(values, starts)
+                is_best = values >= np.repeat(V[open_ids], degree[open_ids]) - 1e-12
+                first = np.minimum.reduceat(np.where(is_best, np.arange(len(values)), len(values)), starts)
+                policy[open_ids] = g.child_action[edge_lo + first]
+
+        self.values = V
+        self.policy_array = policy
+        print(f"Valori esatti in una passata su {len(g.level_ptr) - 1} livelli.")
+
+        if self.classic:
+            agent = np.flatnonzero(policy >= 0)
+            self.V = dict(zip(g.codes.tolist(), V.tolist()))
+            self.policy = dict(zip(g.codes[agent].tolist(), policy[agent].tolist()))
 
     ## ------------------------------------------------------------------
     ## 4. TEST
     ## ------------------------------------------------------------------
     
-    def play_game(self):
+    def play_game(self, policy=None):
+        """
+        policy: funzione griglia -> casella usata al posto della policy calcolata
+        (es. AlphaBetaSolver.best_move); di default self.get_action
+        """
+        if policy is None and not self.build_model:
+            raise ValueError("Senza modello (build_model=False) play_game richiede una policy")
+        policy = policy or self.get_action
         state = self.empty_board
         print("\n--- Partita Dimostrativa (Agente vs Random) ---")
         self.render(state)
         
         while True:
             # Turno Agente
-            if state not in self.policy:
+            action = policy(state)
+            if action is None:
                 print("Nessuna mossa valida o stato terminale.")
                 break
                 
-            action = self.policy[state]
             print(f"Agente sceglie pos: {action}")
             
             # Applica mossa agente
-            l = list(state)
-            l[action] = 1
-            state = tuple(l)
+            state = self.play(state, action, 1)
             self.render(state)
             
-            if self.check_win(state, 1):
+            if self.winner(state) == 1:
                 print("Agente VINCE!")
                 return
-            if 0 not in state:
+            if not self.free_cells(state):
                 print("PAREGGIO!")
                 return
                 
             # Turno Avversario (Random)
-            valid = [i for i, x in enumerate(state) if x == 0]
+            valid = self.free_cells(state)
             opp_action = np.random.choice(valid)
             print(f"Avversario sceglie pos: {opp_action}")
             
-            l = list(state)
-            l[opp_action] = -1
-            state = tuple(l)
+            state = self.play(state, opp_action, -1)
             self.render(state)
             
-            if self.check_win(state, -1):
+            if self.winner(state) == -1:
                 print("Avversario VINCE!")
                 return
-            if 0 not in state:
+            if not self.free_cells(state):
                 print("PAREGGIO!")
                 return
 
-    def render(self, board):
+    def exact_outcome(self, policy=None):
+        """
+        Probabilità esatte di vittoria, pareggio e sconfitta contro l'avversario
+        casuale giocando con policy (di default self.get_action), invece di
+        stimarle con partite simulate: vedi tictactoe_eval.exact_outcome (3x3)
+        """
+        if not self.classic:
+            raise ValueError("La valutazione esatta è disponibile solo per il 3x3 classico")
+        return tictactoe_eval.exact_outcome(policy or self.get_action)[0]
+
+    ## Regole sulla griglia corrente: tabelle del 3x3 o MNKBoard per le altre
+
+    def play(self, state, action, player):
+        if self.classic:
+            return board.play(state, action, player)
+        return state + (1 if player == 1 else 2) * int(self.rules.pow3[action])
+
+    def winner(self, state):
+        if self.classic:
+            return board.winner(state)
+        return int(self.rules.winner(np.array([state]))[0])
+
+    def free_cells(self, state):
+        if self.classic:
+            return board.valid_actions(state)
+        return np.flatnonzero(self.rules.decode(state) == 0).tolist()
+
+    def get_action(self, state):
+        """Azione della policy sulla griglia state (None se non c'è)"""
+        if self.classic:
+            action = self.policy.get(self.canonical(state))
+            if action is not None and self.symmetric:
+                # La policy è definita sulla griglia canonica: riportiamo la casella indietro
+                action = board.original_action(state, action)
+            return action
+
+        key, transform = state, 0
+        if self.symmetric:
+            keys, transforms = self.rules.canonical(np.array([state]), return_transform=True)
+            key, transform = int(keys[0]), int(transforms[0])
+        action = int(self.policy_array[self.graph.index([key])[0]])
+        if action < 0:
+            return None
+        return int(self.rules.symmetries[transform][action])
+
+    def render(self, state):
         symbols = {0: '.', 1: 'X', -1: 'O'}
-        arr = np.array(board).reshape(3,3)
+        arr = self.rules.decode(state).reshape(self.rules.rows, self.rules.cols)
         print("\n")
         for row in arr:
             print(" ".join([symbols[x] for x in row]))
 
+def benchmark(repeats=5):
+    """
+    Dimensioni del modello compilato e tempo di value iteration per ogni
+    motore, senza e con la riduzione per simmetria
+    """
+    results = []
+    for symmetric in (False, True):
+        solver = TicTacToeDP(symmetric=symmetric)
+        sizes = (len(solver.codes), len(np.flatnonzero(np.diff(solver.state_ptr))), len(solver.sa_action), len(solver.prob))
+        times = []
+        for method in METHODS:
+            best = float("inf")
+            for _ in range(repeats):
+                start = time.perf_counter()
+                solver.value_iteration(method=method)
+                best = min(best, time.perf_counter() - start)
+            times.append(best)
+        results.append(("simmetrie" if symmetric else "completo", sizes, times))
+
+    print(f"\n{'modello':<10} {'stati':>7} {'agente':>7} {'righe':>7} {'esiti':>7}" + "".join(f" {m + ' (ms)':>16}" for m in METHODS))
+    for name, sizes, times in results:
+        print(f"{name:<10}" + "".join(f" {n:>7}" for n in sizes) + "".join(f" {1000 * t:>16.2f}" for t in times))
+
+def solve_mnk(rows, cols, k, symmetric=False):
+    """
+    Risolve un m,n,k-game contro l'avversario casuale con solve_graph e
+    riporta dimensioni, tempi e picco di memoria (tracemalloc vede anche
+    i buffer NumPy)
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    solver = TicTacToeDP(model_file=None, symmetric=symmetric, rows=rows, cols=cols, k=k)
+    enumerated = time.perf_counter()
+    solver.value_iteration(method="graph")
+    solved = time.perf_counter()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"\n{rows}x{cols} k={k}{' (simmetrie)' if symmetric else ''}")
+    print(f"Stati: {solver.graph.num_states}  archi: {solver.graph.num_edges}")
+    print(f"Enumerazione: {enumerated - start:.2f} s  soluzione: {solved - enumerated:.2f} s")
+    print(f"Picco di memoria: {peak / 2**20:.0f} MB")
+    print(f"V(griglia vuota) = {solver.values[0]:.4f}, prima mossa: {solver.get_action(solver.empty_board)}")
+    return solver
+
 if __name__ == "__main__":
-    # Crea solver
-    solver = TicTacToeDP()
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        benchmark()
+        sys.exit()
+
+    # "python tictactoe_dp.py alphabeta [R C K]": l'agente gioca con alpha-beta
+    # (gioco ottimo contro un avversario ottimo), senza risolvere il modello
+    if len(sys.argv) > 1 and sys.argv[1] == "alphabeta":
+        rows, cols, k = (int(x) for x in sys.argv[2:5]) if len(sys.argv) > 4 else (3, 3, 3)
+        searcher = AlphaBetaSolver(rows, cols, k)
+        solver = TicTacToeDP(model_file=None, rows=rows, cols=cols, k=k, build_model=False)
+        solver.play_game(policy=searcher.best_move)
+        if solver.classic:
+            tictactoe_eval.report("\nAlpha-beta vs casuale (esatto)", searcher.best_move)
+        searcher.report()
+        sys.exit()
+
+    # "python tictactoe_dp.py mnk 4 4 3 [symmetric]": m,n,k-game generico
+    if len(sys.argv) > 4 and sys.argv[1] == "mnk":
+        rows, cols, k = (int(x) for x in sys.argv[2:5])
+        solver = solve_mnk(rows, cols, k, symmetric="symmetric" in sys.argv[5:])
+        solver.play_game()
+        sys.exit()
+
+    # Crea solver ("python tictactoe_dp.py symmetric" usa le griglie canoniche)
+    solver = TicTacToeDP(symmetric="symmetric" in sys.argv[1:])
     
     # Esegui Value Iteration (Policy Evaluation + Improvement combinati)
-    solver.value_iteration()
+    # "python tictactoe_dp.py vectorized" / "backward" sceglie il motore
+    methods = [arg for arg in sys.argv[1:] if arg in METHODS]
+    method = methods[0] if methods else "loop"
+    solver.value_iteration(method=method)
     
     # Testa
-    solver.play_game()
\ No newline at end of file
+    solver.play_game()
+    tictactoe_eval.report("\nPolicy ottima vs casuale (esatto)", solver.get_action)
\ No newline at end of file
@@ -1,7 +1,162 @@
+import time
 import numpy as np
-import random
+import tictactoe_board as board
+
+## ------------------------------------------------------------------
+## 1. AMBIENTE: N PARTITE IN PARALLELO
+## ------------------------------------------------------------------
+
+POW3 = np.array(board.POW3, dtype=np.int64)
 
 class TicTacToeEnv:
+    """
+    num_games partite giocate in parallelo, tutte alla stessa mossa:
+    griglie (N, 9) int8 con 0 vuota, 1 X, -1 O e i rispettivi codici in
+    base 3 (vedi tictactoe_board.py). Vittorie e pareggi si leggono dalle
+    tabelle WINNER / NUM_EMPTY con un solo gather per tutte le partite.
+    Le partite finite restano ferme finché tutte le altre non terminano.
+    """
+
+    def __init__(self, num_games=1, seed=None):
+        self.num_games = num_games
+        self.rng = np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self):
+        self.board = np.zeros((self.num_games, 9), dtype=np.int8)
+        self.codes = np.zeros(self.num_games, dtype=np.int64)
+        self.done = np.zeros(self.num_games, dtype=bool)
+        self.player = 1 # X muove per primo
+        return self.codes
+
+    def legal_moves(self):
+        """Maschera (N, 9) delle caselle libere nelle partite ancora in corso"""
+        return (self.board == 0) & ~self.done[:, None]
+
+    def afterstates(self, legal):
+        """Codici (N, 9) delle griglie dopo ogni mossa legale del giocatore di turno (0 altrove)"""
+        after = self.codes[:, None] + board.DIGIT[self.player] * POW3
+        return np.where(legal, after, 0)
+
+    def step(self, actions):
+        """Una mossa del giocatore di turno in ogni partita in corso"""
+        rows = np.flatnonzero(~self.done)
+        self.board[rows, actions[rows]] = self.player
+        self.codes[rows] += board.DIGIT[self.player] * POW3[actions[rows]]
+        self.done[rows] = (board.WINNER[self.codes[rows]] != 0) | (board.NUM_EMPTY[self.codes[rows]] == 0)
+        self.player = -self.player
+        return self.codes
+
+    def outcome(self):
+        """Risultato dal punto di vista di X: 1 vittoria, 0 sconfitta, 0.5 pareggio"""
+        return np.select([board.WINNER[self.codes] == 1, board.WINNER[self.codes] == -1], [1.0, 0.0], 0.5)
+
+## ------------------------------------------------------------------
+## 2. POLICY: ENTRAMBI I GIOCATORI USANO LA STESSA TABELLA
+## ------------------------------------------------------------------
+
+def new_value_table():
+    """
+    V[code] = probabilità stimata che vinca X (pareggio = 0.5), una voce per
+    ogni codice. Le griglie terminali hanno già il loro valore esatto.
+    """
+    V = np.full(board.NUM_CODES, 0.5, dtype=np.float32)
+    V[board.WINNER == 1] = 1.0
+    V[board.WINNER == -1] = 0.0
+    return V
+
+def choose_moves(env, V, epsilon):
+    """
+    Epsilon-greedy su tutte le partite: X sceglie il dopo-mossa di valore
+    massimo, O quello di valore minimo. Le mosse casuali vengono da
+    random_moves.
+    """
+    legal = env.legal_moves()
+    values = V[env.afterstates(legal)]
+    score = np.where(legal, values if env.player == 1 else -values, -np.inf)
+    greedy = score.argmax(axis=1)
+
+    explore = env.rng.random(env.num_games) < epsilon
+    return np.where(explore, random_moves(env, legal), greedy)
+
+def random_moves(env, legal=None):
+    """Mossa uniforme tra le caselle libere di ogni partita (argmax di punteggi casuali mascherati)"""
+    if legal is None:
+        legal = env.legal_moves()
+    return np.where(legal, env.rng.random(legal.shape), -1.0).argmax(axis=1)
+
+## ------------------------------------------------------------------
+## 3. ADDESTRAMENTO IN SELF-PLAY
+## ------------------------------------------------------------------
+
+def train_self_play(V, num_games, num_rounds, alpha, epsilon_start, epsilon_min, seed=0):
+    """
+    num_rounds turni da num_games partite parallele. Dopo ogni mossa:
+        V(s) <- V(s) + alpha * [V(s') - V(s)]
+    con s la griglia prima della mossa e s' quella dopo, per entrambi i
+    giocatori. Se più partite aggiornano la stessa griglia nello stesso
+    passo si usa la media degli errori TD (scatter con bincount).
+    """
+    env = TicTacToeEnv(num_games, seed=seed)
+    epsilon = epsilon_start
+    epsilon_decay = (epsilon_start - epsilon_min) / max(1, num_rounds - 1)
+
+    for round_idx in range(num_rounds):
+        env.reset()
+        while not env.done.all():
+            active = ~env.done
+            previous = env.codes[active]
+            env.step(choose_moves(env, V, epsilon))
+
+            td = V[env.codes[active]] - V[previous]
+            td_sum = np.bincount(previous, weights=td, minlength=len(V))
+            counts = np.bincount(previous, minlength=len(V))
+            V += (alpha * td_sum / np.maximum(counts, 1)).astype(np.float32)
+
+        epsilon = max(epsilon_min, epsilon - epsilon_decay)
+        if (round_idx + 1) % 10 == 0:
+            print(f"Turno {round_idx + 1}/{num_rounds} ({(round_idx + 1) * num_games} partite). Epsilon: {epsilon:.3f}")
+    return V
+
+## ------------------------------------------------------------------
+## 4. VALUTAZIONE
+## ------------------------------------------------------------------
+
+def evaluate(V, num_games, agent=1, seed=1):
+    """
+    Agente greedy (X se agent=1, O se agent=-1) contro avversario casuale:
+    frazione di vittorie, pareggi e sconfitte dell'agente
+    """
+    env = TicTacToeEnv(num_games, seed=seed)
+    while not env.done.all():
+        if env.player == agent:
+            env.step(choose_moves(env, V, 0.0))
+        else:
+            env.step(random_moves(env))
+    result = env.outcome() if agent == 1 else 1.0 - env.outcome()
+    return np.mean(result == 1.0), np.mean(result == 0.5), np.mean(result == 0.0)
+
+if __name__ == "__main__":
+    NUM_GAMES = 4096     # partite in parallelo per turno
+    NUM_ROUNDS = 50
+    ALPHA = 0.2
+    EPSILON_START = 1.0
+    EPSILON_MIN = 0.05
+    NUM_TEST_GAMES = 100000
+
+    V = new_value_table()
+    print("Inizio self-play...")
+    start = time.time()
+    train_self_play(V, NUM_GAMES, NUM_ROUNDS, ALPHA, EPSILON_START, EPSILON_MIN)
+    elapsed = time.time() - start
+    print(f"Addestramento: {NUM_GAMES * NUM_ROUNDS} partite in {elapsed:.2f} s ({NUM_GAMES * NUM_ROUNDS / elapsed:.0f} partite/s)")
+
+    for agent, name in ((1, "X"), (-1, "O")):
+        wins, draws, losses = evaluate(V, NUM_TEST_GAMES, agent)
+        print(f"Agente {name} vs casuale ({NUM_TEST_GAMES} partite): vittorie {wins:.3f}, pareggi {draws:.3f}, sconfitte {losses:.3f}")
 
-    def __init__(self):
-        self.board = np.zeros(9, dtype=int)
\ No newline at end of file
+    # Greedy contro greedy: con la policy ottima finisce sempre in pareggio
+    env = TicTacToeEnv(1)
+    while not env.done.all():
+        env.step(choose_moves(env, V, 0.0))
+    print(f"Self-play greedy: {'pareggio' if env.outcome()[0] == 0.5 else 'vince ' + ('X' if env.outcome()[0] == 1 else 'O')}")
@@ -0,0 +1,63 @@
+import time
+import tictactoe_board as board
+
+def exact_outcome(policy, code=0):
+    """
+    Probabilità esatte di vittoria, pareggio e sconfitta di una policy fissa
+    dell'agente (X) contro l'avversario casuale uniforme di TicTacToeEnv.step
+    e TicTacToeDP.transition, a partire dalla griglia code (X di turno).
+
+    policy: funzione codice -> casella, es. TicTacToeDP.get_action o la
+    scelta greedy su una v_table. Un solo passaggio all'indietro sull'albero
+    delle partite: il risultato di ogni griglia con X di turno è la media
+    dei risultati dopo ogni risposta dell'avversario, memorizzato per
+    codice (le trasposizioni si visitano una volta sola).
+
+    Restituisce ((vittorie, pareggi, sconfitte), griglie valutate).
+    """
+    memo = {}
+
+    def outcome(code):
+        if code in memo:
+            return memo[code]
+        action = policy(code)
+        if action is None or not board.is_free(code, action):
+            raise ValueError(f"la policy sceglie {action} sulla griglia {board.decode(code)}")
+
+        after = board.play(code, action, 1)
+        if board.check_win(after, 1):
+            result = (1.0, 0.0, 0.0)
+        elif board.is_full(after):
+            result = (0.0, 1.0, 0.0)
+        else:
+            replies = board.valid_actions(after)
+            prob = 1.0 / len(replies)
+            win = draw = loss = 0.0
+            for opp_action in replies:
+                next_code = board.play(after, opp_action, -1)
+                if board.check_win(next_code, -1):
+                    loss += prob
+                elif board.is_full(next_code):
+                    draw += prob
+                else:
+                    w, d, l = outcome(next_code)
+                    win += prob * w
+                    draw += prob * d
+                    loss += prob * l
+            result = (win, draw, loss)
+        memo[code] = result
+        return result
+
+    return outcome(code), len(memo)
+
+def report(name, policy):
+    start = time.perf_counter()
+    (win, draw, loss), num_states = exact_outcome(policy)
+    elapsed = time.perf_counter() - start
+    print(f"{name}: vittorie {win:.4f}, pareggi {draw:.4f}, sconfitte {loss:.4f} "
+          f"({num_states} griglie, {1000 * elapsed:.1f} ms)")
+    return win, draw, loss
+
+if __name__ == "__main__":
+    # "python tictactoe_eval.py": policy di riferimento (prima casella libera)
+    report("Prima casella libera", lambda code: board.valid_actions(code)[0])